@@ -0,0 +1,286 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+from PIL import Image, ImageDraw
+
+import sakecharts
+from sakecharts import batch, render
+
+# Benchmark harness for the sakecharts renderers and the start-up time of the
+# command line entry points.
+#
+#   python chart-benchmark.py                              # stage timings + scaling curves
+#   python chart-benchmark.py --save-baseline bench.json   # record a baseline
+#   python chart-benchmark.py --compare bench.json         # exit 1 on regressions
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Entry point start-up measured by bench_startup: name -> command run in a fresh interpreter
+STARTUP_COMMANDS = {
+    "import_sakecharts": [sys.executable, "-c", "import sakecharts; sakecharts.ChartLayout()"],
+    "import_renderer": [sys.executable, "-c", "import sakecharts; sakecharts.render_chart_bytes"],
+    "cli_help": [sys.executable, "sakeblog-charts-creation.py", "--help"],
+}
+
+# Catalog size planned at once by the plan_chart_lines timing
+PLAN_SAKES = 100_000
+
+
+def random_params(rng: random.Random, param_names: List[str]) -> dict:
+    return {name: {"value": rng.uniform(0, 100), "style": rng.choice(["solid", "dotted"])} for name in param_names}
+
+
+def write_synthetic_catalog(path: str, size: int, param_names: List[str], seed: int = 0):
+    """Writes a CSV catalog of randomized sakes in the format read by iter_catalog."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "text"] + param_names + [f"{name}_style" for name in param_names])
+        for i in range(size):
+            params = random_params(rng, param_names)
+            writer.writerow([f"sake_{i:06d}", f"銘柄{i} BY{i % 30}"]
+                            + [f"{params[name]['value']:.2f}" for name in param_names]
+                            + [params[name]["style"] for name in param_names])
+
+
+def measure(fn: Callable, repeat: int) -> dict:
+    """Runs fn repeat times (after one warm-up call) and returns median/min wall time in ms."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples)}
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def peak_heap_mb(layout, params: dict, tmp_dir: str) -> float:
+    """Runs every stage and function once under tracemalloc and returns the peak traced Python heap."""
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            bench_stages(layout, params, tmp_dir, 1)
+            bench_functions(layout, params, tmp_dir, 1)
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return traced_peak / (1024 * 1024)
+
+
+def bench_stages(layout, params: dict, tmp_dir: str, repeat: int) -> dict:
+    """Times decode, draw, text, encode and write separately for every chart type."""
+    results = {}
+    for chart_name in sakecharts.chart_names(layout):
+        base_image = sakecharts.chart_base_image(layout, chart_name)
+        stages = {}
+
+        def decode():
+            with Image.open(base_image) as image:
+                image.convert("RGBA")
+        stages["decode"] = measure(decode, repeat)
+        stages["template_copy"] = measure(lambda: sakecharts.TEMPLATE_CACHE.get(base_image), repeat)
+
+        if chart_name == sakecharts.SIMPLE_CHART_NAME:
+            font = layout.get_font()
+
+            def text():
+                image = sakecharts.TEMPLATE_CACHE.get(base_image)
+                draw = ImageDraw.Draw(image)
+                draw.textbbox((0, 0), sakecharts.SIMPLE_CHART_TEXT, font=font)
+                draw.text((400, 300), sakecharts.SIMPLE_CHART_TEXT, fill=layout.font_color, font=font)
+            stages["text"] = measure(text, repeat)
+            render = lambda: sakecharts.render_sake_simple_chart(layout, params, sakecharts.SIMPLE_CHART_TEXT, base_image)
+        else:
+            lines = sakecharts.get_chart_lines(layout, sakecharts.get_chart_def(layout, chart_name), params)
+            render = lambda: sakecharts.render_chart_lines(layout, lines, base_image)
+        stages["draw"] = measure(render, repeat)
+
+        image = render()
+        stages["encode"] = measure(lambda: sakecharts.encode_chart(layout, image), repeat)
+        data = sakecharts.encode_chart(layout, image)
+        output_path = os.path.join(tmp_dir, f"{chart_name}.{layout.output_format}")
+
+        def write():
+            with open(output_path, "wb") as f:
+                f.write(data)
+        stages["write"] = measure(write, repeat)
+        stages["bytes"] = len(data)
+        results[chart_name] = stages
+    return results
+
+
+def bench_functions(layout, params: dict, tmp_dir: str, repeat: int) -> dict:
+    """Times the public render functions end to end."""
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["create_sake_simple_chart"] = measure(lambda: sakecharts.create_sake_simple_chart(
+            layout, params, sakecharts.SIMPLE_CHART_TEXT, sakecharts.SIMPLE_CHART_BASE_IMAGE,
+            os.path.join(tmp_dir, "simple.png")), repeat)
+        for chart_info in sakecharts.get_chart_definitions(layout, params):
+            results[f"draw_chart_lines[{chart_info['name']}]"] = measure(lambda: sakecharts.draw_chart_lines(
+                layout, chart_info["lines"], chart_info["base_image"], os.path.join(tmp_dir, "lines.png")), repeat)
+
+    rng = random.Random(2)
+    values, styles = sakecharts.params_columns(random_params(rng, sakecharts.PARAM_NAMES) for _ in range(1000))
+    values, styles = values.repeat(PLAN_SAKES // 1000, axis=0), styles.repeat(PLAN_SAKES // 1000, axis=0)
+    results[f"plan_chart_lines[{PLAN_SAKES}]"] = measure(lambda: sakecharts.plan_chart_lines(layout, values, styles), repeat)
+
+    canvas = Image.new("RGBA", (1350, 800))
+    draw = ImageDraw.Draw(canvas)
+    results["_draw_dotted_line"] = measure(lambda: render._draw_dotted_line(
+        draw, (500.5, 2), (500.5, 800), layout.line_color, layout.line_width), repeat)
+    return results
+
+
+def bench_startup(repeat: int) -> dict:
+    """Times a cold interpreter running each of STARTUP_COMMANDS, including interpreter start-up."""
+    results = {}
+    for name, command in STARTUP_COMMANDS.items():
+        results[name] = measure(lambda: subprocess.run(command, check=True, stdout=subprocess.DEVNULL), repeat)
+    return results
+
+
+def bench_scaling(layout, sizes: List[int], worker_counts: List[int], tmp_dir: str) -> List[dict]:
+    """Renders synthetic catalogs of each size with each worker count and records throughput."""
+    results = []
+    for size in sizes:
+        catalog_path = os.path.join(tmp_dir, f"catalog_{size}.csv")
+        write_synthetic_catalog(catalog_path, size, sakecharts.PARAM_NAMES)
+        for workers in worker_counts:
+            batch.RENDER_MEMO.clear()
+            output_root = os.path.join(tmp_dir, f"out_{size}_{workers}")
+            start_time = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                rendered = sakecharts.render_catalog(catalog_path, output_root, layout, workers, force=True)
+            elapsed = time.perf_counter() - start_time
+            results.append({
+                "sakes": size,
+                "workers": workers,
+                "charts": rendered,
+                "seconds": elapsed,
+                "charts_per_sec": rendered / elapsed if elapsed > 0 else 0.0,
+                "peak_rss_mb": peak_rss_mb(),
+                "peak_children_rss_mb": peak_rss_mb(children=True),
+            })
+            print(f"  {size:>6} sakes x {workers:>2} workers: {results[-1]['charts_per_sec']:8.1f} charts/sec")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Returns a description of every timing that got slower than the baseline by more than threshold."""
+    regressions = []
+    for section in ("stages", "functions", "startup"):
+        for name, current in results.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                continue
+            pairs = [(name, current, previous)] if "median_ms" in current else \
+                [(f"{name}.{stage}", current[stage], previous[stage])
+                 for stage in current if isinstance(current[stage], dict) and stage in previous]
+            for label, now, before in pairs:
+                if before["median_ms"] > 0 and now["median_ms"] > before["median_ms"] * (1 + threshold):
+                    regressions.append(f"{section}/{label}: {before['median_ms']:.2f} -> {now['median_ms']:.2f} ms")
+    previous_scaling = {(r["sakes"], r["workers"]): r for r in baseline.get("scaling", [])}
+    for run in results.get("scaling", []):
+        before = previous_scaling.get((run["sakes"], run["workers"]))
+        if before and run["charts_per_sec"] < before["charts_per_sec"] / (1 + threshold):
+            regressions.append(f"scaling/{run['sakes']}x{run['workers']}: "
+                               f"{before['charts_per_sec']:.1f} -> {run['charts_per_sec']:.1f} charts/sec")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sake chart renderers.")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per measurement (default: 10)")
+    parser.add_argument("--sizes", default="20,100", help="Comma-separated synthetic catalog sizes (default: 20,100)")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts (default: 1,2,4)")
+    parser.add_argument("--skip-scaling", action="store_true", help="Only run the stage and function timings")
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a baseline JSON file and exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging (default: 0.10)")
+    args = parser.parse_args()
+
+    os.chdir(SCRIPT_DIR)  # Templates are resolved relative to the scripts
+    layout = sakecharts.ChartLayout()
+    params = random_params(random.Random(1), sakecharts.PARAM_NAMES)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("Stage timings (median ms):")
+        results["stages"] = bench_stages(layout, params, tmp_dir, args.repeat)
+        for chart_name, stages in results["stages"].items():
+            timings = "  ".join(f"{stage}={value['median_ms']:.2f}" for stage, value in stages.items()
+                                if isinstance(value, dict))
+            print(f"  {chart_name:<14} {timings}  ({stages['bytes']} bytes)")
+
+        print("Function timings (median ms):")
+        results["functions"] = bench_functions(layout, params, tmp_dir, args.repeat)
+        for name, value in results["functions"].items():
+            print(f"  {name:<40} {value['median_ms']:8.2f}")
+
+        print("Start-up (median ms):")
+        results["startup"] = bench_startup(args.repeat)
+        for name, value in results["startup"].items():
+            print(f"  {name:<40} {value['median_ms']:8.2f}")
+
+        if not args.skip_scaling:
+            print("Scaling:")
+            results["scaling"] = bench_scaling(
+                layout,
+                [int(size) for size in args.sizes.split(",")],
+                [int(workers) for workers in args.workers.split(",")],
+                tmp_dir,
+            )
+        # Tracing slows allocations down, so the heap peak gets its own pass outside the timings
+        results["peak_python_heap_mb"] = peak_heap_mb(layout, params, tmp_dir)
+    results["peak_rss_mb"] = peak_rss_mb()
+    print(f"Peak memory: {results['peak_rss_mb']:.1f} MB RSS, {results['peak_python_heap_mb']:.1f} MB Python heap")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("Regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
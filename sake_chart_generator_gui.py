@@ -1,140 +1,191 @@
+import copy
 import os
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
-from PIL import Image, ImageDraw, ImageFont
-from dataclasses import dataclass, field
-from typing import List, Tuple
-
-# --- This section is adapted from sakeblog-charts-creation.py ---
-
-# Chart layout and style settings
-@dataclass
-class ChartLayout:
-    simple_left: int = 274
-    simple_right: int = 835
-    simple_top: int = 110
-    simple_bottom: int = 608
-    star_size: int = 12
-    adv_left: int = 222
-    adv_right: int = 1270
-    adv_wine_yeast_offset: int = 22
-    line_width: int = 8
-    line_color: str = "orange"
-    font_path_mac: str = "/Library/Fonts/Arial Unicode.ttf"
-    font_path_win: str = "C:/Windows/Fonts/meiryo.ttc"
-    font_size: int = 24
-    font_color: str = "black"
-
-    @property
-    def simple_width(self) -> int:
-        return self.simple_right - self.simple_left
-
-    @property
-    def simple_height(self) -> int:
-        return self.simple_bottom - self.simple_top
-
-    @property
-    def adv_width(self) -> int:
-        return self.adv_right - self.adv_left
-
-    def get_font(self):
-        font_path = self.font_path_mac if os.path.exists(self.font_path_mac) else self.font_path_win
-        if not os.path.exists(font_path):
-            print(f"Warning: Font file not found. Using default font.")
-            return ImageFont.load_default()
-        return ImageFont.truetype(font_path, self.font_size)
-
-# Drawing Functions
-def create_sake_simple_chart(layout: ChartLayout, params: dict, text: str, base_image_path: str, output_path: str):
-    with Image.open(base_image_path) as image:
-        draw = ImageDraw.Draw(image)
-        font = layout.get_font()
-        x_pct = params["dry_or_sweet"]["value"]
-        y_pct = params["fruity_or_rich"]["value"]
-        x = layout.simple_left + (layout.simple_width * x_pct / 100)
-        y = layout.simple_top + (layout.simple_height * y_pct / 100)
-        size = layout.star_size
-        draw.polygon([(x - size, y), (x, y - size), (x + size, y), (x, y + size)], fill="blue")
-        text_bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_height = text_bbox[3] - text_bbox[1]
-        text_x = x - (text_width / 2)
-        text_y = y - size - text_height
-        draw.text((text_x, text_y), text, fill=layout.font_color, font=font)
-        image.save(output_path)
-
-def _draw_dotted_line(draw, start: Tuple[float, float], end: Tuple[float, float], color: str, width: int):
-    line_length = ((end[0] - start[0])**2 + (end[1] - start[1])**2)**0.5
-    dots = int(line_length / 12)
-    if dots == 0: return
-    for i in range(dots):
-        seg_start_x = start[0] + (end[0] - start[0]) * i / dots
-        seg_start_y = start[1] + (end[1] - start[1]) * i / dots
-        seg_end_x = start[0] + (end[0] - start[0]) * (i + 0.5) / dots
-        seg_end_y = start[1] + (end[1] - start[1]) * (i + 0.5) / dots
-        draw.line([(seg_start_x, seg_start_y), (seg_end_x, seg_end_y)], fill=color, width=width)
-
-def draw_chart_lines(layout: ChartLayout, lines: List[dict], base_image_path: str, output_path: str):
-    with Image.open(base_image_path) as img:
-        draw = ImageDraw.Draw(img)
-        for line_info in lines:
-            start, end, line_type = line_info["start"], line_info["end"], line_info["style"]
-            if line_type == "solid":
-                draw.line([start, end], fill=layout.line_color, width=layout.line_width)
-            elif line_type == "dotted":
-                _draw_dotted_line(draw, start, end, color=layout.line_color, width=layout.line_width)
-        img.save(output_path)
-
-# Chart Definitions
-@dataclass
-class LineDef:
-    param_name: str; y_start: int; y_end: int; x_offset: int = 0
-
-@dataclass
-class ChartDef:
-    name: str; base_image: str; output_image: str; line_defs: List[LineDef]
-
-def get_chart_definitions(layout: ChartLayout, params: dict) -> List[dict]:
-    def get_x_coord(param_name: str, offset: int = 0) -> float:
-        return layout.adv_left + (layout.adv_width * params[param_name]["value"] / 100) + offset
-    chart_defs = [
-        ChartDef("basic_sake", "basic.png", "basic-lined.png", [LineDef("saketype", 2, 100), LineDef("rice", 100, 202), LineDef("fstarter", 202, 305), LineDef("fruity_or_rich", 340, 460)]),
-        ChartDef("advanced_sake", "advanced.png", "advanced-lined.png", [LineDef("saketype", 2, 100), LineDef("rice", 100, 202), LineDef("fstarter", 202, 305), LineDef("yeast", 305, 398), LineDef("fruity_or_rich", 398, 515), LineDef("amino", 515, 575), LineDef("acid", 575, 635), LineDef("svm", 635, 695), LineDef("dry_or_sweet", 695, 800)]),
-        ChartDef("basic_wine", "basic_wine.png", "basic_wine-lined.png", [LineDef("saketype", 2, 100), LineDef("rice", 100, 202), LineDef("fstarter", 202, 305), LineDef("dry_or_sweet", 325, 550)]),
-        ChartDef("advanced_wine", "advanced_wine.png", "advanced_wine-lined.png", [LineDef("saketype", 2, 100), LineDef("rice", 100, 202), LineDef("fstarter", 202, 305), LineDef("yeast", 305, 390, x_offset=layout.adv_wine_yeast_offset), LineDef("amino", 390, 485), LineDef("acid", 485, 580), LineDef("svm", 580, 670), LineDef("dry_or_sweet", 670, 780)]),
-    ]
-    processed_charts = []
-    for chart_def in chart_defs:
-        lines_to_draw = []
-        for line_def in chart_def.line_defs:
-            x_coord = get_x_coord(line_def.param_name, line_def.x_offset)
-            lines_to_draw.append({"start": (x_coord, line_def.y_start), "end": (x_coord, line_def.y_end), "style": params[line_def.param_name]["style"]})
-        processed_charts.append({"base_image": chart_def.base_image, "output_image": chart_def.output_image, "lines": lines_to_draw})
-    return processed_charts
+from tkinter import ttk, messagebox, filedialog
+from PIL import Image, ImageTk
+
+from sakecharts import (SAKE_PARAMS, SIMPLE_CHART_BASE_IMAGE, SIMPLE_CHART_NAME, SIMPLE_CHART_TEXT, ChartLayout,
+                        chart_names, get_chart_defs, iter_catalog_output_dirs, iter_render_sake)
+
+CHARTS_PER_SAKE = len(chart_names(ChartLayout()))
+
+# --- Background Rendering ---
+
+class RenderWorker(threading.Thread):
+    """
+    Renders queued sakes off the Tk main thread.
+
+    Progress is reported through the results queue, which the GUI drains with after() polling:
+    ("chart", path), ("done", None), ("cancelled", None) or ("error", message).
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self._generation = 0  # Bumped by cancel(); jobs from older generations are dropped
+
+    def submit(self, params: dict, text: str, output_dir: str):
+        self.jobs.put((self._generation, copy.deepcopy(params), text, output_dir))
+
+    def cancel(self):
+        self._generation += 1
+
+    def run(self):
+        layout = ChartLayout()
+        while True:
+            generation, params, text, output_dir = self.jobs.get()
+            if generation != self._generation:
+                self.results.put(("cancelled", None))
+                continue
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+                for output_path, *_ in iter_render_sake(layout, params, text, output_dir):
+                    self.results.put(("chart", output_path))
+                    if generation != self._generation:
+                        self.results.put(("cancelled", None))
+                        break
+                else:
+                    self.results.put(("done", None))
+            except FileNotFoundError as e:
+                self.results.put(("error", f"Required base image not found: {e.filename}"))
+            except Exception as e:
+                self.results.put(("error", f"An unexpected error occurred: {e}"))
+
+# --- Live Preview ---
+
+class ChartPreview(ttk.LabelFrame):
+    """
+    Scaled-down preview of one chart template with the parameter lines as canvas items.
+
+    Each template is decoded and scaled once; slider changes only move existing canvas
+    items, so updates never touch PIL or the filesystem.
+    """
+    WIDTH = 480
+
+    def __init__(self, master, layout: ChartLayout, params: dict, text_var: tk.StringVar):
+        super().__init__(master, text="Preview", padding="10")
+        self.layout = layout
+        self.params = params
+        self.text_var = text_var
+        self.chart_defs = {chart_def.name: chart_def for chart_def in get_chart_defs(layout)}
+        self.photos = {}  # chart name -> (PhotoImage, scale)
+        self.items = {}  # param name -> [(canvas item, LineDef)] for the shown chart
+        self.scale = 1.0
+
+        self.chart_var = tk.StringVar(value="advanced_sake")
+        chart_combo = ttk.Combobox(self, textvariable=self.chart_var, state="readonly",
+                                   values=[SIMPLE_CHART_NAME] + list(self.chart_defs))
+        chart_combo.pack(fill=tk.X)
+        chart_combo.bind("<<ComboboxSelected>>", lambda e: self.show_chart())
+
+        self.canvas = tk.Canvas(self, width=self.WIDTH, height=self.WIDTH, highlightthickness=0)
+        self.canvas.pack(pady=(5, 0))
+        text_var.trace_add("write", lambda *args: self.update_text())
+        self.show_chart()
+
+    def _photo(self, chart_name: str):
+        if chart_name not in self.photos:
+            base_image = SIMPLE_CHART_BASE_IMAGE if chart_name == SIMPLE_CHART_NAME else self.chart_defs[chart_name].base_image
+            with Image.open(base_image) as image:
+                scale = self.WIDTH / image.width
+                scaled = image.resize((self.WIDTH, round(image.height * scale)), Image.Resampling.LANCZOS)
+            self.photos[chart_name] = (ImageTk.PhotoImage(scaled, master=self.canvas), scale)
+        return self.photos[chart_name]
+
+    def show_chart(self):
+        """Rebuilds the canvas for the selected chart. Only called when the chart changes."""
+        chart_name = self.chart_var.get()
+        self.canvas.delete("all")
+        self.items = {}
+        try:
+            photo, self.scale = self._photo(chart_name)
+        except FileNotFoundError as e:
+            self.canvas.create_text(self.WIDTH / 2, 20, text=f"Template not found: {e.filename}")
+            return
+        self.canvas.configure(height=photo.height())
+        self.canvas.create_image(0, 0, image=photo, anchor=tk.NW)
+
+        if chart_name == SIMPLE_CHART_NAME:
+            self.star = self.canvas.create_polygon(0, 0, 0, 0, 0, 0, 0, 0, fill="blue")
+            font_size = max(6, round(self.layout.font_size * self.scale))
+            self.label = self.canvas.create_text(0, 0, anchor=tk.S, fill=self.layout.font_color,
+                                                 font=("TkDefaultFont", font_size))
+            self.items = {"dry_or_sweet": [], "fruity_or_rich": []}
+            self.update_text()
+            self.update_star()
+            return
+
+        width = max(1, round(self.layout.line_width * self.scale))
+        for line_def in self.chart_defs[chart_name].line_defs:
+            item = self.canvas.create_line(0, 0, 0, 0, fill=self.layout.line_color, width=width)
+            self.items.setdefault(line_def.param_name, []).append((item, line_def))
+        for name in self.items:
+            self.update_param(name)
+
+    def update_param(self, name: str):
+        """Moves the canvas items for one parameter to its current value and style."""
+        if name not in self.items:
+            return
+        if self.chart_var.get() == SIMPLE_CHART_NAME:
+            self.update_star()
+            return
+        layout, s = self.layout, self.scale
+        value, style = self.params[name]["value"], self.params[name]["style"]
+        # Same dash pattern as the rendered charts, scaled to the preview
+        dash = (max(1, round(layout.dash_length * s)), max(1, round(layout.dash_gap * s))) if style == "dotted" else ()
+        for item, line_def in self.items[name]:
+            x = (layout.adv_left + layout.adv_width * value / 100 + line_def.x_offset) * s
+            self.canvas.coords(item, x, line_def.y_start * s, x, line_def.y_end * s)
+            self.canvas.itemconfigure(item, dash=dash)
+
+    def update_star(self):
+        layout, s = self.layout, self.scale
+        x = (layout.simple_left + layout.simple_width * self.params["dry_or_sweet"]["value"] / 100) * s
+        y = (layout.simple_top + layout.simple_height * self.params["fruity_or_rich"]["value"] / 100) * s
+        size = layout.star_size * s
+        self.canvas.coords(self.star, x - size, y, x, y - size, x + size, y, x, y + size)
+        self.canvas.coords(self.label, x, y - size)
+
+    def update_text(self):
+        if self.chart_var.get() == SIMPLE_CHART_NAME and self.items:
+            self.canvas.itemconfigure(self.label, text=self.text_var.get())
 
 # --- GUI Application ---
 
 class ChartGeneratorApp(tk.Tk):
+    POLL_MS = 16  # Drain worker results about once per frame at 60 fps
+    MAX_RESULTS_PER_POLL = 200
+
     def __init__(self):
         super().__init__()
         self.title("Sake Chart Generator")
-        self.geometry("600x550") # Increased height for new widgets
+        self.geometry("1120x620") # Wide enough for the preview pane
 
         # Default parameters
-        self.sake_params = {
-            "saketype": {"value": 45, "style": "solid"}, "rice": {"value": 50, "style": "dotted"},
-            "fstarter": {"value": 70, "style": "solid"}, "yeast": {"value": 53, "style": "solid"},
-            "fruity_or_rich": {"value": 20, "style": "solid"}, "amino": {"value": 82, "style": "solid"},
-            "acid": {"value": 67, "style": "dotted"}, "svm": {"value": 51, "style": "solid"},
-            "dry_or_sweet": {"value": 100, "style": "solid"},
-        }
-        self.simple_chart_text = tk.StringVar(value="獺祭45 BY24")
+        self.sake_params = copy.deepcopy(SAKE_PARAMS)
+        self.simple_chart_text = tk.StringVar(value=SIMPLE_CHART_TEXT)
+        self.status_text = tk.StringVar(value="Ready")
+
+        # Charts queued / finished since the queue was last empty
+        self.pending_sakes = 0
+        self.total_charts = 0
+        self.done_charts = 0
+
+        self.worker = RenderWorker()
+        self.worker.start()
 
         self.create_widgets()
+        self.after(self.POLL_MS, self.poll_worker)
 
     def create_widgets(self):
+        self.preview = ChartPreview(self, ChartLayout(), self.sake_params, self.simple_chart_text)
+        self.preview.pack(side=tk.RIGHT, fill=tk.Y, padx=(0, 10), pady=10)
+
         main_frame = ttk.Frame(self, padding="10")
-        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
         # Text input
         text_frame = ttk.LabelFrame(main_frame, text="Simple Chart Text", padding="10")
@@ -161,17 +212,43 @@ class ChartGeneratorApp(tk.Tk):
             
             val_label = ttk.Label(row_frame, text=f"{data['value']:.0f}", width=4)
             val_label.pack(side=tk.LEFT)
-            slider.configure(command=lambda v, l=val_label: l.config(text=f"{float(v):.0f}"))
+            slider.configure(command=lambda v, name=name, l=val_label: self.on_slider(name, float(v), l))
 
             # Combobox for style
             style_var = tk.StringVar(value=data["style"])
             self.style_vars[name] = style_var
             style_combo = ttk.Combobox(row_frame, textvariable=style_var, values=["solid", "dotted"], width=7, state="readonly")
             style_combo.pack(side=tk.LEFT, padx=5)
+            style_combo.bind("<<ComboboxSelected>>", lambda e, name=name: self.on_style(name))
+
+        # Buttons
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(pady=10)
+        ttk.Button(button_frame, text="Generate Charts", command=self.generate_charts).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Load Catalog...", command=self.load_catalog).pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_rendering, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        # Progress
+        self.progress = ttk.Progressbar(main_frame, orient=tk.HORIZONTAL, mode="determinate")
+        self.progress.pack(fill=tk.X)
+        ttk.Label(main_frame, textvariable=self.status_text).pack(fill=tk.X, pady=(5, 0))
+
+    def on_slider(self, name: str, value: float, val_label: ttk.Label):
+        val_label.config(text=f"{value:.0f}")
+        self.sake_params[name]["value"] = value
+        self.preview.update_param(name)
+
+    def on_style(self, name: str):
+        self.sake_params[name]["style"] = self.style_vars[name].get()
+        self.preview.update_param(name)
 
-        # Generate button
-        button = ttk.Button(main_frame, text="Generate Charts", command=self.generate_charts)
-        button.pack(pady=10)
+    def enqueue_sake(self, params: dict, text: str, output_dir: str):
+        self.worker.submit(params, text, output_dir)
+        self.pending_sakes += 1
+        self.total_charts += CHARTS_PER_SAKE
+        self.progress.configure(maximum=self.total_charts)
+        self.cancel_button.configure(state=tk.NORMAL)
 
     def generate_charts(self):
         # Update params from GUI
@@ -180,34 +257,62 @@ class ChartGeneratorApp(tk.Tk):
         for name, style_var in self.style_vars.items():
             self.sake_params[name]["style"] = style_var.get()
 
+        print("Starting chart generation...")
+        self.enqueue_sake(self.sake_params, self.simple_chart_text.get(), ".")
+
+    def load_catalog(self):
+        catalog_path = filedialog.askopenfilename(
+            title="Load Sake Catalog", filetypes=[("Sake catalogs", "*.csv *.jsonl *.ndjson"), ("All files", "*.*")]
+        )
+        if not catalog_path:
+            return
+        output_root = os.path.join(os.path.dirname(catalog_path), "charts")
         try:
-            print("Starting chart generation...")
-            layout = ChartLayout()
-
-            # 1. Create simple chart
-            create_sake_simple_chart(
-                layout=layout, params=self.sake_params, text=self.simple_chart_text.get(),
-                base_image_path="sake-basic-chart.png", output_path="sake-chart.png"
-            )
-            print("Saved simple chart to sake-chart.png")
-
-            # 2. Create advanced charts
-            chart_definitions = get_chart_definitions(layout, self.sake_params)
-            for chart_info in chart_definitions:
-                draw_chart_lines(
-                    layout=layout, lines=chart_info["lines"],
-                    base_image_path=chart_info["base_image"], output_path=chart_info["output_image"]
-                )
-                print(f"Saved chart to {chart_info['output_image']}")
-            
-            print("...chart generation complete.")
-            messagebox.showinfo("Success", "All charts have been generated successfully!")
+            for output_dir, text, params in iter_catalog_output_dirs(catalog_path, output_root):
+                self.enqueue_sake(params, text, output_dir)
+        except (OSError, KeyError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not read catalog: {e}")
 
-        except FileNotFoundError as e:
-            messagebox.showerror("Error", f"Required base image not found: {e.filename}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+    def cancel_rendering(self):
+        self.worker.cancel()
+        self.status_text.set("Cancelling...")
+
+    def poll_worker(self):
+        """Applies worker results to the UI in small batches so the event loop never stalls."""
+        try:
+            for _ in range(self.MAX_RESULTS_PER_POLL):
+                kind, payload = self.worker.results.get_nowait()
+                if kind == "chart":
+                    self.done_charts += 1
+                    self.status_text.set(f"Saved {payload}")
+                    continue
+
+                # The sake finished, was cancelled or failed
+                self.pending_sakes -= 1
+                if kind == "error":
+                    self.worker.cancel()
+                    messagebox.showerror("Error", payload)
+                if self.pending_sakes == 0:
+                    self.finish_queue(kind)
+        except queue.Empty:
+            pass
+        self.progress.configure(value=self.done_charts)
+        self.after(self.POLL_MS, self.poll_worker)
+
+    def finish_queue(self, last_result: str):
+        if last_result == "done":
+            print("...chart generation complete.")
+            self.status_text.set(f"Done: {self.done_charts} charts generated")
+        elif last_result == "cancelled":
+            self.status_text.set(f"Cancelled after {self.done_charts} charts")
+        else:
+            self.status_text.set("Stopped on error")
+        self.total_charts = self.done_charts = 0
+        self.cancel_button.configure(state=tk.DISABLED)
 
 if __name__ == "__main__":
+    from sakecharts import render
+
+    render.QUIET = True  # Saved charts are reported in the status bar
     app = ChartGeneratorApp()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
@@ -0,0 +1,120 @@
+"""
+Sake and wine chart rendering.
+
+Public names are loaded on first access, so `import sakecharts` (and reading
+ChartLayout, the chart definitions or the CLI) does not import NumPy or PIL.
+"""
+
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    # config
+    "SAKE_PARAMS": "config",
+    "SIMPLE_CHART_TEXT": "config",
+    "PNG_COMPRESS_STRATEGIES": "config",
+    "FontRegistry": "config",
+    "FONT_REGISTRY": "config",
+    "ChartLayout": "config",
+    # charts
+    "LineDef": "charts",
+    "ChartDef": "charts",
+    "get_chart_defs": "charts",
+    "get_chart_def": "charts",
+    "get_chart_lines": "charts",
+    "get_chart_definitions": "charts",
+    # render
+    "RenderTimings": "render",
+    "TIMINGS": "render",
+    "TemplateCache": "render",
+    "TEMPLATE_CACHE": "render",
+    "LabelCache": "render",
+    "LABEL_CACHE": "render",
+    "encode_chart": "render",
+    "save_chart": "render",
+    "render_sake_simple_chart": "render",
+    "create_sake_simple_chart": "render",
+    "render_chart_lines": "render",
+    "render_planned_lines": "render",
+    "render_sake_simple_overlay": "render",
+    "render_chart_lines_overlay": "render",
+    "draw_chart_lines": "render",
+    # batch
+    "PARAM_NAMES": "batch",
+    "SIMPLE_CHART_NAME": "batch",
+    "SIMPLE_CHART_BASE_IMAGE": "batch",
+    "SIMPLE_CHART_OUTPUT_IMAGE": "batch",
+    "chart_names": "batch",
+    "chart_base_image": "batch",
+    "render_chart_image": "batch",
+    "render_chart_bytes": "batch",
+    "render_chart_overlay": "batch",
+    "render_chart_svg": "batch",
+    "canonical_params": "batch",
+    "canonical_chart_key": "batch",
+    "chart_cache_key": "batch",
+    "EncodedChartCache": "batch",
+    "RENDER_MEMO": "batch",
+    "render_chart_bytes_cached": "batch",
+    "render_overlay_bytes_cached": "batch",
+    "copy_overlay_templates": "batch",
+    "sake_render_tasks": "batch",
+    "encode_render_task": "batch",
+    "write_render_output": "batch",
+    "run_render_task": "batch",
+    "iter_render_sake": "batch",
+    "render_sake": "batch",
+    "render_tasks_parallel": "batch",
+    "RenderProgress": "batch",
+    "iter_encoded_tasks": "batch",
+    "RenderManifest": "batch",
+    "iter_catalog": "batch",
+    "iter_catalog_output_dirs": "batch",
+    "render_catalog": "batch",
+    # svg
+    "svg_chart_lines": "svg",
+    "svg_sake_simple_chart": "svg",
+    # scatter
+    "LabelGrid": "scatter",
+    "place_labels": "scatter",
+    "render_scatter_chart": "scatter",
+    "render_catalog_scatter": "scatter",
+    "render_density_chart": "scatter",
+    "render_catalog_density": "scatter",
+    # shared
+    "SharedTemplateStore": "shared",
+    "attach_shared_templates": "shared",
+    # archive
+    "ChartArchiveWriter": "archive",
+    "ChartArchive": "archive",
+    "render_catalog_archive": "archive",
+    # planner
+    "LINE_PLAN_DTYPE": "planner",
+    "LinePlan": "planner",
+    "params_columns": "planner",
+    "catalog_columns": "planner",
+    "plan_chart_lines": "planner",
+    # pipeline
+    "PipelineStage": "pipeline",
+    "RenderPipeline": "pipeline",
+    "render_tasks_pipeline": "pipeline",
+    # server
+    "create_chart_server": "server",
+    # cli
+    "main": "cli",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,193 @@
+"""Archive output: charts streamed into one ZIP (stored) or TAR file with a JSON index, read back by random access."""
+
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from typing import List
+
+from .batch import (OVERLAY_TEMPLATE_DIR, RenderProgress, _catalog_render_tasks, iter_encoded_tasks,
+                    links_templates, overlay_index, overlay_index_path, template_paths)
+from .config import ChartLayout
+from .render import TIMINGS
+
+# Archive file extension -> format
+ARCHIVE_FORMATS = {".zip": "zip", ".tar": "tar"}
+
+# Member holding the index, appended last
+ARCHIVE_INDEX = "index.json"
+
+
+def archive_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {path} (use .zip or .tar)")
+    return ARCHIVE_FORMATS[ext]
+
+
+def archive_index_path(path: str) -> str:
+    """Returns the path of the copy of the index written next to an archive (charts.zip -> charts.zip.index.json)."""
+    return path + ".index.json"
+
+
+class ChartArchiveWriter:
+    """
+    Streams files into one ZIP or TAR archive as they arrive, without compressing them again.
+
+    The index maps every member name to the offset and size of its data in the archive file.
+    close() appends it as index.json and also writes it next to the archive (see
+    archive_index_path), so ChartArchive can read any member with a single seek.
+    Members may be added from several threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = archive_format(path)
+        self.index = {}
+        self._lock = threading.Lock()
+        self._file = open(path, "wb")
+        if self.format == "zip":
+            self._archive = zipfile.ZipFile(self._file, "w", zipfile.ZIP_STORED)
+        else:
+            self._archive = tarfile.open(fileobj=self._file, mode="w", format=tarfile.PAX_FORMAT)
+
+    def _append(self, name: str, data: bytes) -> int:
+        """Appends one member and returns the offset of its data."""
+        if self.format == "zip":
+            self._archive.writestr(zipfile.ZipInfo(name, time.localtime()[:6]), data)
+            return self._file.tell() - len(data)
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._archive.addfile(info, io.BytesIO(data))
+        # Member data is padded to whole tar blocks
+        return self._file.tell() - len(data) - (-len(data) % tarfile.BLOCKSIZE)
+
+    def add(self, name: str, data: bytes):
+        name = name.replace(os.sep, "/")
+        with self._lock:
+            if name in self.index:
+                raise ValueError(f"Duplicate archive member: {name}")
+            self.index[name] = {"offset": self._append(name, data), "size": len(data)}
+
+    def add_file(self, path: str, name: str):
+        with open(path, "rb") as f:
+            self.add(name, f.read())
+
+    def write_chart(self, layout: ChartLayout, chart_name: str, output_path: str, data: bytes, box: tuple = None):
+        """Like write_render_output, with output_path as the member name."""
+        self.add(output_path, data)
+        if layout.output_mode == "overlay":
+            index = overlay_index(layout, chart_name, output_path, box)
+            self.add(overlay_index_path(output_path), json.dumps(index, ensure_ascii=False).encode("utf-8"))
+
+    def close(self):
+        with self._lock:
+            if self._archive is None:
+                return
+            payload = json.dumps({"format": self.format, "members": self.index}, ensure_ascii=False).encode("utf-8")
+            self._append(ARCHIVE_INDEX, payload)
+            self._archive.close()
+            self._file.close()
+            self._archive = None
+        with open(archive_index_path(self.path), "wb") as f:
+            f.write(payload)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ChartArchive:
+    """
+    Reads single members of an archive written by ChartArchiveWriter without extracting it.
+
+    The index comes from the file next to the archive when it is current, otherwise from the
+    archive's own index.json. Reads are one seek each and may come from several threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = archive_format(path)
+        self.index = self._load_index()["members"]
+        self._lock = threading.Lock()
+        self._file = open(path, "rb")
+
+    def _load_index(self) -> dict:
+        index_path = archive_index_path(self.path)
+        if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(self.path):
+            with open(index_path, encoding="utf-8") as f:
+                return json.load(f)
+        if self.format == "zip":
+            with zipfile.ZipFile(self.path) as archive:
+                return json.loads(archive.read(ARCHIVE_INDEX))
+        with tarfile.open(self.path) as archive:
+            return json.load(archive.extractfile(ARCHIVE_INDEX))
+
+    def names(self) -> List[str]:
+        return list(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def read(self, name: str) -> bytes:
+        """Returns one member's bytes. Raises KeyError for names not in the archive."""
+        entry = self.index[name]
+        with self._lock:
+            self._file.seek(entry["offset"])
+            data = self._file.read(entry["size"])
+        if len(data) != entry["size"]:
+            raise ValueError(f"Truncated archive member: {name}")
+        return data
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def render_catalog_archive(catalog_path: str, archive_path: str, layout: ChartLayout = None, workers: int = 1,
+                           pipeline: bool = False) -> int:
+    """
+    Renders every sake in a catalog into one archive instead of a directory tree.
+
+    Members are named like render_catalog's files relative to its output root
+    (<sake name>/<chart file>, templates/ in overlay mode). Every chart is rendered;
+    the manifest is not used. With workers > 1 (or None) charts are rendered in a process
+    pool, and with pipeline set through a RenderPipeline. Returns the number of charts written.
+    """
+    layout = layout or ChartLayout()
+    progress = RenderProgress()
+    tasks = _catalog_render_tasks(layout, catalog_path, "", progress, make_dirs=False)
+
+    with ChartArchiveWriter(archive_path) as archive:
+        if links_templates(layout):
+            for path in template_paths(layout):
+                archive.add_file(path, f"{OVERLAY_TEMPLATE_DIR}/{os.path.basename(path)}")
+        if pipeline:
+            from .pipeline import RenderPipeline
+
+            # Members are appended one at a time, so a single writer thread suffices
+            render_pipeline = RenderPipeline(layout, workers, writers=1, sink=archive.write_chart)
+            charts = render_pipeline.run(tasks, progress.done)
+            print(render_pipeline.report())
+        else:
+            charts = 0
+            for chart_name, output_path, data, box, render_seconds, stages in iter_encoded_tasks(layout, tasks, workers):
+                with TIMINGS.stage("save"):
+                    archive.write_chart(layout, chart_name, output_path, data, box)
+                TIMINGS.add(chart_name, {**stages, **TIMINGS.take()})
+                progress.done((output_path, len(data), render_seconds, chart_name, stages))
+                charts += 1
+
+    progress.report(layout, "Stored", destination=f" in {archive_path} ({os.path.getsize(archive_path)} bytes)")
+    return charts
@@ -0,0 +1,720 @@
+"""Batch rendering: named charts, render memoization, process pools and catalogs."""
+
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import astuple
+from functools import lru_cache
+from itertools import islice
+from typing import List, Tuple
+
+from PIL import Image
+
+from . import render
+from .charts import get_chart_def, get_chart_defs, get_chart_lines
+from .config import SAKE_PARAMS, ChartLayout
+from .render import (TEMPLATE_CACHE, TIMINGS, encode_chart, render_chart_lines, render_chart_lines_overlay,
+                     render_sake_simple_chart, render_sake_simple_overlay)
+from .svg import svg_chart_lines, svg_sake_simple_chart
+
+
+# Parameter names in the order they appear in SAKE_PARAMS (and in catalog columns)
+PARAM_NAMES = list(SAKE_PARAMS.keys())
+
+SIMPLE_CHART_BASE_IMAGE = "sake-basic-chart.png"
+SIMPLE_CHART_OUTPUT_IMAGE = "sake-chart.png"
+SIMPLE_CHART_NAME = "sake_simple"
+
+
+def chart_names(layout: ChartLayout) -> List[str]:
+    """Returns the names accepted by render_chart_image: the simple chart and every ChartDef."""
+    return [SIMPLE_CHART_NAME] + [chart_def.name for chart_def in get_chart_defs(layout)]
+
+
+def chart_base_image(layout: ChartLayout, chart_name: str) -> str:
+    if chart_name == SIMPLE_CHART_NAME:
+        return SIMPLE_CHART_BASE_IMAGE
+    return get_chart_def(layout, chart_name).base_image
+
+
+def render_chart_image(layout: ChartLayout, params: dict, chart_name: str, text: str = "") -> Image.Image:
+    """Renders one chart by name and returns the PIL image for further compositing."""
+    if chart_name == SIMPLE_CHART_NAME:
+        return render_sake_simple_chart(layout, params, text, SIMPLE_CHART_BASE_IMAGE)
+    chart_def = get_chart_def(layout, chart_name)
+    return render_chart_lines(layout, get_chart_lines(layout, chart_def, params), chart_def.base_image)
+
+
+def render_chart_svg(layout: ChartLayout, params: dict, chart_name: str, text: str = "") -> str:
+    """Returns one chart by name as an SVG document (no raster work; see sakecharts.svg)."""
+    if chart_name == SIMPLE_CHART_NAME:
+        return svg_sake_simple_chart(layout, params, text, SIMPLE_CHART_BASE_IMAGE)
+    chart_def = get_chart_def(layout, chart_name)
+    return svg_chart_lines(layout, get_chart_lines(layout, chart_def, params), chart_def.base_image)
+
+
+def render_chart_bytes(layout: ChartLayout, params: dict, chart_name: str, text: str = "") -> bytes:
+    """Renders one chart by name and returns it encoded in the layout's output format, without touching disk."""
+    if layout.output_format.lower() == "svg":
+        return render_chart_svg(layout, params, chart_name, text).encode("utf-8")
+    with render_chart_image(layout, params, chart_name, text) as image:
+        return encode_chart(layout, image)
+
+
+def render_chart_overlay(layout: ChartLayout, params: dict, chart_name: str,
+                         text: str = "") -> Tuple[Image.Image, Tuple[int, int]]:
+    """Renders only what one chart draws on its template. Returns (transparent overlay, (left, top))."""
+    if chart_name == SIMPLE_CHART_NAME:
+        return render_sake_simple_overlay(layout, params, text, SIMPLE_CHART_BASE_IMAGE)
+    chart_def = get_chart_def(layout, chart_name)
+    return render_chart_lines_overlay(layout, get_chart_lines(layout, chart_def, params), chart_def.base_image)
+
+
+# --- Canonical Parameters and Render Memoization ---
+
+# Parameters read by the simple chart
+SIMPLE_CHART_PARAMS = ("dry_or_sweet", "fruity_or_rich")
+
+
+def _canonical_positions(layout: ChartLayout, chart_name: str, params: dict) -> List[tuple]:
+    """
+    Maps each parameter a chart actually uses to the whole pixel it is drawn at.
+
+    Returns (param name, pixel, style) tuples; values that land on the same pixel
+    render identically, so they share a position. Style is None where it is not drawn.
+
+    The simple chart's star and label are drawn at sub-pixel positions, so its
+    "pixels" are the exact star coordinates render_sake_simple_chart computes.
+    """
+    if chart_name == SIMPLE_CHART_NAME:
+        return [
+            ("dry_or_sweet", layout.simple_left + (layout.simple_width * params["dry_or_sweet"]["value"] / 100), None),
+            ("fruity_or_rich", layout.simple_top + (layout.simple_height * params["fruity_or_rich"]["value"] / 100),
+             None),
+        ]
+    positions = []
+    for line_def in get_chart_def(layout, chart_name).line_defs:
+        param = params[line_def.param_name]
+        x_coord = layout.adv_left + (layout.adv_width * param["value"] / 100) + line_def.x_offset
+        positions.append((line_def.param_name, math.floor(x_coord), param["style"]))
+    return positions
+
+
+def canonical_params(layout: ChartLayout, chart_name: str, params: dict) -> dict:
+    """
+    Returns only the parameters a chart uses, with line positions snapped to the pixel grid of its template.
+
+    Charts rendered from the canonical parameters are pixel-identical to the originals.
+    The simple chart is drawn at sub-pixel positions, so its values are kept as they are.
+    """
+    canonical = {}
+    if chart_name == SIMPLE_CHART_NAME:
+        for name in SIMPLE_CHART_PARAMS:
+            canonical[name] = {"value": params[name]["value"], "style": params[name]["style"]}
+        return canonical
+
+    chart_def = get_chart_def(layout, chart_name)
+    for line_def, (name, pixel, style) in zip(chart_def.line_defs, _canonical_positions(layout, chart_name, params)):
+        # Aim for the pixel centre so float rounding cannot push the line into its neighbour
+        value = (pixel + 0.5 - layout.adv_left - line_def.x_offset) * 100 / layout.adv_width
+        canonical[name] = {"value": value, "style": style}
+    return canonical
+
+
+def canonical_chart_key(layout: ChartLayout, chart_name: str, params: dict, text: str = "") -> tuple:
+    """Hashable key that is equal for any two requests producing the same chart."""
+    label = text if chart_name == SIMPLE_CHART_NAME else None
+    return (astuple(layout), chart_name, tuple(_canonical_positions(layout, chart_name, params)), label)
+
+
+def chart_cache_key(layout: ChartLayout, chart_name: str, params: dict, text: str = "") -> tuple:
+    """
+    canonical_chart_key plus the template file's mtime and size, so memoized charts and
+    HTTP ETags change when a template is edited under a long-running process.
+    """
+    stat = os.stat(chart_base_image(layout, chart_name))
+    return canonical_chart_key(layout, chart_name, params, text) + ((stat.st_mtime_ns, stat.st_size),)
+
+
+class EncodedChartCache:
+    """Bounded LRU of encoded charts, keyed by canonical_chart_key."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> encoded bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return data
+
+    def put(self, key: tuple, data: bytes):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Process-wide memo used by render_chart_bytes_cached
+RENDER_MEMO = EncodedChartCache()
+
+
+def render_chart_bytes_cached(layout: ChartLayout, params: dict, chart_name: str, text: str = "",
+                              cache: EncodedChartCache = None) -> bytes:
+    """Like render_chart_bytes, but equivalent requests are served from an LRU instead of re-rendering."""
+    cache = RENDER_MEMO if cache is None else cache
+    key = chart_cache_key(layout, chart_name, params, text)
+    data = cache.get(key)
+    if data is None:
+        data = render_chart_bytes(layout, canonical_params(layout, chart_name, params), chart_name, text)
+        cache.put(key, data)
+    return data
+
+
+def render_overlay_bytes_cached(layout: ChartLayout, params: dict, chart_name: str, text: str = "",
+                                cache: EncodedChartCache = None) -> Tuple[bytes, Tuple[int, int, int, int]]:
+    """
+    Renders and encodes a chart overlay through the memo.
+
+    Returns (encoded overlay, (left, top, width, height) of the overlay on its template).
+    """
+    cache = RENDER_MEMO if cache is None else cache
+    key = chart_cache_key(layout, chart_name, params, text)
+    entry = cache.get(key)
+    if entry is None:
+        overlay, (left, top) = render_chart_overlay(layout, canonical_params(layout, chart_name, params), chart_name, text)
+        with overlay:
+            entry = (encode_chart(layout, overlay), (left, top, overlay.width, overlay.height))
+        cache.put(key, entry)
+    return entry
+
+
+# --- Overlay Output ---
+
+# Directory (under the output root) holding the one-time template copies in overlay mode
+OVERLAY_TEMPLATE_DIR = "templates"
+
+
+def links_templates(layout: ChartLayout) -> bool:
+    """True if the output refers to template files instead of containing the template pixels."""
+    return layout.output_mode == "overlay" or (layout.output_format.lower() == "svg" and bool(layout.svg_template_url))
+
+
+def copy_overlay_templates(layout: ChartLayout, output_root: str) -> str:
+    """Copies every template to <output_root>/templates/ unless an up-to-date copy exists. Returns that directory."""
+    template_dir = os.path.join(output_root, OVERLAY_TEMPLATE_DIR)
+    os.makedirs(template_dir, exist_ok=True)
+    for path in template_paths(layout):
+        target = os.path.join(template_dir, os.path.basename(path))
+        if not os.path.exists(target) or os.path.getmtime(target) != os.path.getmtime(path):
+            shutil.copy2(path, target)
+    return template_dir
+
+
+def overlay_index(layout: ChartLayout, chart_name: str, output_path: str, box: Tuple[int, int, int, int]) -> dict:
+    """
+    Describes an overlay: which template it sits on and where.
+
+    The template path is relative to the output root (see copy_overlay_templates).
+    """
+    left, top, width, height = box
+    template_width, template_height = TEMPLATE_CACHE.size(chart_base_image(layout, chart_name))
+    return {
+        "chart": chart_name,
+        "overlay": os.path.basename(output_path),
+        "template": f"{OVERLAY_TEMPLATE_DIR}/{os.path.basename(chart_base_image(layout, chart_name))}",
+        "template_width": template_width,
+        "template_height": template_height,
+        "left": left,
+        "top": top,
+        "width": width,
+        "height": height,
+    }
+
+
+def overlay_index_path(output_path: str) -> str:
+    return os.path.splitext(output_path)[0] + ".json"
+
+
+def write_overlay_index(layout: ChartLayout, chart_name: str, output_path: str, box: Tuple[int, int, int, int]):
+    """Writes the overlay_index JSON placed next to an overlay."""
+    with open(overlay_index_path(output_path), "w", encoding="utf-8") as f:
+        json.dump(overlay_index(layout, chart_name, output_path, box), f, ensure_ascii=False)
+
+
+# --- Task-Based Rendering ---
+
+def sake_render_tasks(layout: ChartLayout, params: dict, text: str, output_dir: str = ".") -> List[tuple]:
+    """
+    Splits the charts of one sake into independent, picklable render tasks.
+
+    Each task is (chart name, params, text, output path) and is executed by run_render_task.
+    """
+    simple_output = layout.output_file(os.path.join(output_dir, SIMPLE_CHART_OUTPUT_IMAGE))
+    tasks = [(SIMPLE_CHART_NAME, params, text, simple_output)]
+    for chart_def in get_chart_defs(layout):
+        tasks.append((chart_def.name, params, text, layout.output_file(os.path.join(output_dir, chart_def.output_image))))
+    return tasks
+
+
+def encode_render_task(layout: ChartLayout, task: tuple) -> Tuple[bytes, tuple, float]:
+    """
+    Renders and encodes one task produced by sake_render_tasks through the render memo.
+
+    Returns (encoded chart, overlay box or None, render + encode seconds).
+    """
+    chart_name, params, text, _ = task
+    start_time = time.perf_counter()
+    box = None
+    if layout.output_mode == "overlay":
+        data, box = render_overlay_bytes_cached(layout, params, chart_name, text)
+    else:
+        data = render_chart_bytes_cached(layout, params, chart_name, text)
+    return data, box, time.perf_counter() - start_time
+
+
+def write_render_output(layout: ChartLayout, chart_name: str, output_path: str, data: bytes, box: tuple = None):
+    """Writes an encoded chart (and in overlay mode its JSON index) to output_path."""
+    with open(output_path, "wb") as f:
+        f.write(data)
+    if layout.output_mode == "overlay":
+        write_overlay_index(layout, chart_name, output_path, box)
+
+
+def run_render_task(layout: ChartLayout, task: tuple) -> Tuple[str, int, float, str, dict]:
+    """
+    Executes one task produced by sake_render_tasks through the render memo.
+
+    Returns (output path, bytes written, render + encode seconds, chart name, stage timings).
+    Stage timings are empty unless TIMINGS is enabled. Nothing is printed; see RenderProgress.
+    """
+    chart_name, _, _, output_path = task
+    TIMINGS.take()
+    data, box, render_seconds = encode_render_task(layout, task)
+    with TIMINGS.stage("save"):
+        write_render_output(layout, chart_name, output_path, data, box)
+    return output_path, len(data), render_seconds, chart_name, TIMINGS.take()
+
+
+# Seconds between progress lines in quiet mode
+PROGRESS_INTERVAL = 2.0
+
+
+class RenderProgress:
+    """
+    Console reporting for written charts, shared by every render path.
+
+    done takes run_render_task results and is meant as the on_done callback of
+    render_tasks_parallel and RenderPipeline.run. It prints a "Saved ..." line per chart,
+    or in quiet mode a progress line every PROGRESS_INTERVAL seconds. report prints the
+    throughput summary. sakes is counted by whoever reads the catalog.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.sakes = 0
+        self.charts = 0
+        self.bytes = 0
+        self.render_seconds = 0.0
+        self._next_report = self.start_time + PROGRESS_INTERVAL
+
+    def done(self, result: Tuple[str, int, float, str, dict]):
+        output_path, nbytes, render_seconds, chart_name = result[:4]
+        self.charts += 1
+        self.bytes += nbytes
+        self.render_seconds += render_seconds
+        if not render.QUIET:
+            print(f"Saved {chart_name} chart to {output_path} ({nbytes} bytes, {render_seconds * 1000:.1f} ms)")
+            return
+        now = time.perf_counter()
+        if now >= self._next_report:
+            rate = self.charts / (now - self.start_time)
+            print(f"... {self.charts} charts for {self.sakes} sakes ({rate:.1f} charts/sec)", flush=True)
+            self._next_report = now + PROGRESS_INTERVAL
+
+    def report(self, layout: ChartLayout, verb: str, destination: str = "", note: str = ""):
+        """Prints e.g. "Rendered 200 charts for 40 sakes in 6.86s (29.1 charts/sec)" and the average chart."""
+        elapsed = time.perf_counter() - self.start_time
+        rate = self.charts / elapsed if elapsed > 0 else 0.0
+        print(f"{verb} {self.charts} charts for {self.sakes} sakes{destination} in {elapsed:.2f}s "
+              f"({rate:.1f} charts/sec){note}")
+        if self.charts:
+            print(f"Average per chart: {self.bytes / self.charts:.0f} bytes, "
+                  f"{self.render_seconds / self.charts * 1000:.1f} ms render + encode ({layout.output_format})")
+
+
+def iter_render_sake(layout: ChartLayout, params: dict, text: str, output_dir: str = "."):
+    """Renders the charts of one sake, yielding each run_render_task result as soon as the file is written."""
+    if links_templates(layout):
+        copy_overlay_templates(layout, output_dir)
+    progress = RenderProgress()
+    for task in sake_render_tasks(layout, params, text, output_dir):
+        result = run_render_task(layout, task)
+        TIMINGS.add(result[3], result[4])
+        progress.done(result)
+        yield result
+
+
+def render_sake(layout: ChartLayout, params: dict, text: str, output_dir: str = ".") -> int:
+    """Renders the simple chart and all advanced charts for one sake. Returns the number of charts written."""
+    return sum(1 for _ in iter_render_sake(layout, params, text, output_dir))
+
+
+# Layout used by run_render_task inside pool worker processes
+_worker_layout = None
+
+
+def _init_render_worker(layout: ChartLayout, templates: list, quiet: bool = False, timings: bool = False):
+    """
+    Pool initializer: stores the settings and loads all templates once per worker.
+
+    templates is either SharedTemplateStore descriptors, attached without copying, or plain paths to decode.
+    """
+    global _worker_layout
+    _worker_layout = layout
+    render.QUIET = quiet
+    TIMINGS.enabled = timings
+    if templates and isinstance(templates[0], tuple):
+        from .shared import attach_shared_templates
+
+        attach_shared_templates(templates)
+        return
+    for path in templates:
+        TEMPLATE_CACHE.get(path)
+
+
+def _run_worker_task(task: tuple) -> Tuple[str, int, float, str, dict]:
+    return run_render_task(_worker_layout, task)
+
+
+def _encode_worker_task(task: tuple) -> Tuple[str, str, bytes, tuple, float, dict]:
+    """Renders and encodes a task without writing it; returns (chart name, output path, data, box, seconds, stages)."""
+    TIMINGS.take()
+    data, box, render_seconds = encode_render_task(_worker_layout, task)
+    return task[0], task[-1], data, box, render_seconds, TIMINGS.take()
+
+
+def template_paths(layout: ChartLayout) -> List[str]:
+    """Returns every base image used by render_sake."""
+    return [SIMPLE_CHART_BASE_IMAGE] + [chart_def.base_image for chart_def in get_chart_defs(layout)]
+
+
+def create_render_pool(layout: ChartLayout, workers: int = None, shared_templates=None) -> ProcessPoolExecutor:
+    """
+    Creates a process pool whose workers have the layout and all templates preloaded.
+
+    With a SharedTemplateStore the workers map its templates instead of decoding their own copies.
+    """
+    templates = shared_templates.descriptors if shared_templates is not None else template_paths(layout)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_render_worker,
+        initargs=(layout, templates, render.QUIET, TIMINGS.enabled),
+    )
+
+
+# Chunks submitted per pool worker ahead of the results being consumed
+IN_FLIGHT_CHUNKS_PER_WORKER = 2
+
+
+def _run_worker_chunk(fn, tasks: list) -> list:
+    return [fn(task) for task in tasks]
+
+
+def _map_bounded(pool: ProcessPoolExecutor, fn, tasks, workers: int = None, chunksize: int = 8):
+    """
+    Like pool.map(fn, tasks, chunksize=chunksize), but reads tasks lazily.
+
+    pool.map submits the whole iterable up front; here at most IN_FLIGHT_CHUNKS_PER_WORKER
+    chunks per worker are pending, so a long catalog streams through in constant memory.
+    """
+    max_in_flight = IN_FLIGHT_CHUNKS_PER_WORKER * (workers or os.cpu_count() or 1)
+    tasks = iter(tasks)
+    in_flight = deque()
+    try:
+        while True:
+            chunk = list(islice(tasks, chunksize))
+            if chunk:
+                in_flight.append(pool.submit(_run_worker_chunk, fn, chunk))
+            if chunk and len(in_flight) < max_in_flight:
+                continue
+            if not in_flight:
+                return
+            yield from in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def render_tasks_parallel(layout: ChartLayout, tasks, workers: int = None, chunksize: int = 8, on_done=None) -> int:
+    """
+    Fans render tasks out over a process pool. Returns the number of charts written.
+
+    The templates are decoded once into shared memory for all workers.
+    on_done, if given, is called in this process with the run_render_task result of each finished chart.
+    Stage timings recorded in the workers are merged into this process's TIMINGS.
+    """
+    from .shared import SharedTemplateStore
+
+    count = 0
+    with SharedTemplateStore(template_paths(layout)) as shared_templates, \
+            create_render_pool(layout, workers, shared_templates) as pool:
+        for result in _map_bounded(pool, _run_worker_task, tasks, workers, chunksize):
+            TIMINGS.add(result[3], result[4])
+            if on_done is not None:
+                on_done(result)
+            count += 1
+    return count
+
+
+def iter_encoded_tasks(layout: ChartLayout, tasks, workers: int = 1, chunksize: int = 8):
+    """
+    Renders and encodes tasks without writing them, in this process or (workers > 1 or None) a process pool.
+
+    Yields (chart name, output path, data, overlay box or None, render + encode seconds, stage timings) in task order.
+    """
+    if workers == 1:
+        for task in tasks:
+            TIMINGS.take()
+            data, box, render_seconds = encode_render_task(layout, task)
+            yield task[0], task[-1], data, box, render_seconds, TIMINGS.take()
+        return
+
+    from .shared import SharedTemplateStore
+
+    with SharedTemplateStore(template_paths(layout)) as shared_templates, \
+            create_render_pool(layout, workers, shared_templates) as pool:
+        yield from _map_bounded(pool, _encode_worker_task, tasks, workers, chunksize)
+
+
+# --- Incremental Rendering ---
+
+MANIFEST_FILE = ".render-manifest.json"
+
+
+@lru_cache(maxsize=64)
+def _file_digest(path: str, mtime: float, size: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def task_digest(layout: ChartLayout, task: tuple) -> str:
+    """
+    Hashes everything that determines a task's output: the template file, the
+    layout and only the inputs that chart actually draws.
+
+    The canonical chart key covers just the parameters listed in that chart's
+    LineDefs, so e.g. "amino" does not affect basic_sake. Charts with a label also
+    cover the font file it is drawn with, so installing a font re-renders them.
+    """
+    chart_name, params, text, _ = task
+    base_image = chart_base_image(layout, chart_name)
+    stat = os.stat(base_image)
+    payload = (_file_digest(base_image, stat.st_mtime, stat.st_size), canonical_chart_key(layout, chart_name, params, text))
+    if chart_name == SIMPLE_CHART_NAME:
+        font_file = layout.font_file()
+        if font_file is not None:
+            font_stat = os.stat(font_file)
+            payload += ((font_file, font_stat.st_mtime_ns, font_stat.st_size),)
+        else:
+            payload += (None,)
+    return hashlib.sha256(repr(payload).encode("utf-8")).hexdigest()
+
+
+class RenderManifest:
+    """Records the input digest of every rendered chart so unchanged charts can be skipped."""
+
+    def __init__(self, output_root: str):
+        self.output_root = output_root
+        self.path = os.path.join(output_root, MANIFEST_FILE)
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def _key(self, output_path: str) -> str:
+        return os.path.relpath(output_path, self.output_root).replace(os.sep, "/")
+
+    def is_current(self, output_path: str, digest: str) -> bool:
+        return self.entries.get(self._key(output_path)) == digest and os.path.exists(output_path)
+
+    def record(self, output_path: str, digest: str):
+        self.entries[self._key(output_path)] = digest
+
+    def save(self):
+        os.makedirs(self.output_root, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def _params_from_row(row: dict) -> dict:
+    """Builds a SAKE_PARAMS-style dict from a flat catalog row ("<param>" and optional "<param>_style" columns)."""
+    params = {}
+    for name in PARAM_NAMES:
+        if row.get(name) in (None, ""):
+            raise ValueError(f"Missing value for column '{name}'")
+        try:
+            value = float(row[name])
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for column '{name}': {row[name]!r}") from None
+        params[name] = {
+            "value": value,
+            "style": row.get(f"{name}_style") or "solid",
+        }
+    return params
+
+
+def iter_catalog(catalog_path: str):
+    """
+    Streams (name, text, params) records from a CSV or JSONL catalog.
+
+    CSV files need a "name" column, one column per parameter and optionally
+    "<param>_style" and "text" columns. JSONL records may use the same flat
+    keys or carry a "params" object shaped like SAKE_PARAMS. A leading byte order
+    mark (as written by Excel) is skipped. Bad rows raise ValueError naming the
+    catalog line and column.
+    """
+    ext = os.path.splitext(catalog_path)[1].lower()
+    with open(catalog_path, encoding="utf-8-sig", newline="") as f:
+        if ext == ".csv":
+            reader = csv.DictReader(f)
+            records = ((reader.line_num, row) for row in reader)
+        elif ext in (".jsonl", ".ndjson"):
+            records = ((line_no, line) for line_no, line in enumerate(f, 1) if line.strip())
+        else:
+            raise ValueError(f"Unsupported catalog format: {catalog_path}")
+
+        for line_no, record in records:
+            try:
+                row = json.loads(record) if isinstance(record, str) else record
+                if not isinstance(row, dict):
+                    raise ValueError("Expected a JSON object")
+                if row.get("name") is None:
+                    raise ValueError("Missing value for column 'name'")
+                name = row["name"]
+                text = row.get("text") or name
+                params = row["params"] if "params" in row else _params_from_row(row)
+            except ValueError as e:
+                raise ValueError(f"{catalog_path}, line {line_no}: {e}") from None
+            yield name, text, params
+
+
+def _safe_dir_name(name: str) -> str:
+    """Turns a sake name into a directory name usable on Windows, macOS and Linux."""
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("._")
+
+
+def iter_catalog_output_dirs(catalog_path: str, output_root: str):
+    """
+    Streams (output directory, text, params) for every sake in a catalog.
+
+    Directories are named after the sanitized sake names. A sake whose name sanitizes to a
+    directory already taken (compared case-insensitively, as on Windows and macOS) gets
+    _2, _3, ... appended, so repeated or near-identical names never share output files.
+    """
+    taken = set()
+    for i, (name, text, params) in enumerate(iter_catalog(catalog_path)):
+        base_name = _safe_dir_name(name) or f"sake_{i}"
+        dir_name, suffix = base_name, 1
+        while dir_name.lower() in taken:
+            suffix += 1
+            dir_name = f"{base_name}_{suffix}"
+        taken.add(dir_name.lower())
+        yield os.path.join(output_root, dir_name), text, params
+
+
+def _catalog_render_tasks(layout: ChartLayout, catalog_path: str, output_root: str, progress: RenderProgress,
+                          make_dirs: bool = True):
+    """
+    Yields the render tasks of every sake in a catalog, counting the sakes in progress
+    and creating the per-sake output directories if make_dirs.
+    """
+    for output_dir, text, params in iter_catalog_output_dirs(catalog_path, output_root):
+        if make_dirs:
+            os.makedirs(output_dir, exist_ok=True)
+        progress.sakes += 1
+        yield from sake_render_tasks(layout, params, text, output_dir)
+
+
+def render_catalog(catalog_path: str, output_root: str, layout: ChartLayout = None, workers: int = 1,
+                   force: bool = False, pipeline: bool = False, writers: int = 4) -> int:
+    """
+    Renders every sake in a catalog into <output_root>/<sake name>/ and reports throughput.
+
+    With workers > 1 (or None for one per CPU) the individual charts are rendered in a process pool.
+    With pipeline set, the catalog is streamed through a RenderPipeline instead, overlapping
+    catalog reading, rendering in workers processes and writing in writers threads.
+    Charts whose inputs match the manifest from a previous run are skipped unless force is set.
+    In overlay mode (and for SVGs linking their templates) the templates are copied once to
+    <output_root>/templates/.
+    """
+    layout = layout or ChartLayout()
+    manifest = RenderManifest(output_root)
+    if links_templates(layout):
+        copy_overlay_templates(layout, output_root)
+    pending = {}  # output path -> digest of the render in flight
+    progress = RenderProgress()
+    skipped = 0
+
+    def changed_tasks():
+        nonlocal skipped
+        for task in _catalog_render_tasks(layout, catalog_path, output_root, progress):
+            digest = task_digest(layout, task)
+            if not force and manifest.is_current(task[-1], digest):
+                skipped += 1
+                continue
+            if task[-1] in pending:
+                raise ValueError(f"More than one chart would be written to {task[-1]}")
+            pending[task[-1]] = digest
+            yield task
+
+    def on_done(result: Tuple[str, int, float, str, dict]):
+        manifest.record(result[0], pending.pop(result[0]))
+        progress.done(result)
+
+    try:
+        if pipeline:
+            from .pipeline import render_tasks_pipeline
+
+            charts = render_tasks_pipeline(layout, changed_tasks(), workers, writers, on_done=on_done)
+        elif workers == 1:
+            charts = 0
+            for task in changed_tasks():
+                result = run_render_task(layout, task)
+                TIMINGS.add(result[3], result[4])
+                on_done(result)
+                charts += 1
+        else:
+            charts = render_tasks_parallel(layout, changed_tasks(), workers, on_done=on_done)
+    finally:
+        manifest.save()
+
+    progress.report(layout, "Rendered", note=f", {skipped} unchanged charts skipped")
+    return charts
@@ -0,0 +1,112 @@
+"""Chart definitions: which parameter lines each template carries and where."""
+
+from dataclasses import dataclass
+from typing import List
+
+from .config import ChartLayout
+
+
+@dataclass
+class LineDef:
+    param_name: str
+    y_start: int
+    y_end: int
+    x_offset: int = 0
+
+@dataclass
+class ChartDef:
+    name: str
+    base_image: str
+    output_image: str
+    line_defs: List[LineDef]
+
+def get_chart_defs(layout: ChartLayout) -> List[ChartDef]:
+    """Returns the ChartDef of every line chart."""
+    return [
+        ChartDef(
+            name="basic_sake",
+            base_image="basic.png",
+            output_image="basic-lined.png",
+            line_defs=[
+                LineDef("saketype", 2, 100),
+                LineDef("rice", 100, 202),
+                LineDef("fstarter", 202, 305),
+                LineDef("fruity_or_rich", 340, 460),
+            ]
+        ),
+        ChartDef(
+            name="advanced_sake",
+            base_image="advanced.png",
+            output_image="advanced-lined.png",
+            line_defs=[
+                LineDef("saketype", 2, 100),
+                LineDef("rice", 100, 202),
+                LineDef("fstarter", 202, 305),
+                LineDef("yeast", 305, 398),
+                LineDef("fruity_or_rich", 398, 515),
+                LineDef("amino", 515, 575),
+                LineDef("acid", 575, 635),
+                LineDef("svm", 635, 695),
+                LineDef("dry_or_sweet", 695, 800),
+            ]
+        ),
+        ChartDef(
+            name="basic_wine",
+            base_image="basic_wine.png",
+            output_image="basic_wine-lined.png",
+            line_defs=[
+                LineDef("saketype", 2, 100),
+                LineDef("rice", 100, 202),
+                LineDef("fstarter", 202, 305),
+                LineDef("dry_or_sweet", 325, 550),
+            ]
+        ),
+        ChartDef(
+            name="advanced_wine",
+            base_image="advanced_wine.png",
+            output_image="advanced_wine-lined.png",
+            line_defs=[
+                LineDef("saketype", 2, 100),
+                LineDef("rice", 100, 202),
+                LineDef("fstarter", 202, 305),
+                LineDef("yeast", 305, 390, x_offset=layout.adv_wine_yeast_offset),
+                LineDef("amino", 390, 485),
+                LineDef("acid", 485, 580),
+                LineDef("svm", 580, 670),
+                LineDef("dry_or_sweet", 670, 780),
+            ]
+        ),
+    ]
+
+
+def get_chart_def(layout: ChartLayout, chart_name: str) -> ChartDef:
+    for chart_def in get_chart_defs(layout):
+        if chart_def.name == chart_name:
+            return chart_def
+    raise ValueError(f"Unknown chart: {chart_name}")
+
+
+def get_chart_lines(layout: ChartLayout, chart_def: ChartDef, params: dict) -> List[dict]:
+    """Converts a chart's LineDefs to the format expected by draw_chart_lines."""
+    lines_to_draw = []
+    for line_def in chart_def.line_defs:
+        x_coord = layout.adv_left + (layout.adv_width * params[line_def.param_name]["value"] / 100) + line_def.x_offset
+        lines_to_draw.append({
+            "start": (x_coord, line_def.y_start),
+            "end": (x_coord, line_def.y_end),
+            "style": params[line_def.param_name]["style"],
+        })
+    return lines_to_draw
+
+
+def get_chart_definitions(layout: ChartLayout, params: dict) -> List[dict]:
+    """Returns a list of dictionaries, each defining a chart to be generated."""
+    processed_charts = []
+    for chart_def in get_chart_defs(layout):
+        processed_charts.append({
+            "name": chart_def.name,
+            "base_image": chart_def.base_image,
+            "output_image": chart_def.output_image,
+            "lines": get_chart_lines(layout, chart_def, params),
+        })
+    return processed_charts
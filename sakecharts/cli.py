@@ -0,0 +1,130 @@
+"""Command line entry point (see sakeblog-charts-creation.py and `python -m sakecharts`)."""
+
+import argparse
+import cProfile
+
+from .config import PNG_COMPRESS_STRATEGIES, SAKE_PARAMS, SIMPLE_CHART_TEXT, ChartLayout
+
+
+def main():
+    """
+    Main function to generate all sake charts.
+    """
+    parser = argparse.ArgumentParser(description="Generate sake charts.")
+    parser.add_argument("--catalog", help="CSV or JSONL sake catalog to render in batch")
+    parser.add_argument("--output-dir", default="charts", help="Root directory for batch output (default: charts)")
+    parser.add_argument("--force", action="store_true", help="Re-render catalog charts even if their inputs are unchanged")
+    parser.add_argument("--font", help="Font file for chart labels (overrides the platform defaults)")
+    parser.add_argument("--format", default="png", choices=["png", "webp", "avif", "svg"], help="Output image format")
+    parser.add_argument("--template-url", default="",
+                        help="With --format svg, link templates at this URL prefix instead of embedding them "
+                             "(templates are copied to <output dir>/templates/)")
+    parser.add_argument("--compress-level", type=int, default=6, help="PNG zlib compression level 0-9 (default: 6)")
+    parser.add_argument("--compress-strategy", default="default", choices=list(PNG_COMPRESS_STRATEGIES),
+                        help="PNG zlib strategy")
+    parser.add_argument("--quantize", type=int, default=0, help="Write palette PNGs with at most this many colors")
+    parser.add_argument("--drop-alpha", action="store_true", help="Write RGB images when the chart is fully opaque")
+    parser.add_argument("--overlay", action="store_true",
+                        help="Write transparent overlays cropped to the drawn marks (plus JSON offsets and "
+                             "one copy of each template) instead of full charts")
+    parser.add_argument("--scatter", metavar="PATH",
+                        help="Plot every sake of --catalog on one simple chart and save it to PATH")
+    parser.add_argument("--density", metavar="PATH",
+                        help="Plot the density of every sake of --catalog as a heatmap on one simple chart")
+    parser.add_argument("--density-cell", type=int, default=6, help="Heatmap cell size in pixels (default: 6)")
+    parser.add_argument("--density-smooth", type=float, default=1.5,
+                        help="Heatmap Gaussian smoothing in cells, 0 to disable (default: 1.5)")
+    parser.add_argument("--archive", metavar="PATH",
+                        help="With --catalog, store every chart in this .zip or .tar archive (plus a JSON index) "
+                             "instead of separate files; with --serve, also serve its members at /archive/<name>")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of render processes (default: 1, 0 for one per CPU)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="With --catalog, stream reading, rendering and writing as overlapping stages "
+                             "and report each stage's throughput and queue depth")
+    parser.add_argument("--writers", type=int, default=4, help="File writer threads for --pipeline (default: 4)")
+    parser.add_argument("--quiet", action="store_true", help="Print a periodic progress line instead of one line per chart")
+    parser.add_argument("--timings", help="Record per-stage render timings and write them to this JSON file")
+    parser.add_argument("--profile", help="Run under cProfile and write stats to this .pstats file "
+                                          "(covers this process only, not pool workers)")
+    parser.add_argument("--serve", action="store_true", help="Run the on-demand chart HTTP server")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP server address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP server port (default: 8000)")
+    args = parser.parse_args()
+    if args.overlay and args.format == "svg":
+        parser.error("--overlay writes raster overlays; use it with png, webp or avif")
+    if (args.scatter or args.density) and (not args.catalog or args.format == "svg"):
+        parser.error("--scatter and --density need --catalog and a raster --format")
+    if args.archive and not (args.catalog or args.serve):
+        parser.error("--archive needs --catalog (to write it) or --serve (to serve it)")
+
+    # Initialize layout and parameters
+    layout = ChartLayout(
+        font_path=args.font,
+        output_format=args.format,
+        png_compress_level=args.compress_level,
+        png_compress_strategy=args.compress_strategy,
+        quantize_colors=args.quantize,
+        drop_opaque_alpha=args.drop_alpha,
+        output_mode="overlay" if args.overlay else "full",
+        svg_template_url=args.template_url,
+    )
+
+    # The renderers pull in NumPy and PIL, so they are only imported once the arguments are valid
+    if args.serve:
+        from .server import create_chart_server
+
+        server = create_chart_server(layout, args.host, args.port, archive_path=args.archive)
+        print(f"Serving charts on http://{args.host}:{server.server_port}/chart")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    from . import render
+    from .batch import (RenderProgress, copy_overlay_templates, links_templates, render_catalog, render_sake,
+                        render_tasks_parallel, sake_render_tasks)
+
+    render.QUIET = args.quiet
+    render.TIMINGS.enabled = bool(args.timings)
+    profiler = cProfile.Profile() if args.profile else None
+
+    print("Starting chart generation...")
+
+    if profiler is not None:
+        profiler.enable()
+    workers = args.workers or None
+    if args.scatter:
+        from .scatter import render_catalog_scatter
+
+        render_catalog_scatter(args.catalog, args.scatter, layout)
+    elif args.density:
+        from .scatter import render_catalog_density
+
+        render_catalog_density(args.catalog, args.density, layout, args.density_cell, args.density_smooth)
+    elif args.catalog and args.archive:
+        from .archive import render_catalog_archive
+
+        render_catalog_archive(args.catalog, args.archive, layout, workers, pipeline=args.pipeline)
+    elif args.catalog:
+        render_catalog(args.catalog, args.output_dir, layout, workers, force=args.force,
+                       pipeline=args.pipeline, writers=args.writers)
+    elif workers == 1:
+        render_sake(layout, SAKE_PARAMS, SIMPLE_CHART_TEXT)
+    else:
+        if links_templates(layout):
+            copy_overlay_templates(layout, ".")
+        render_tasks_parallel(layout, sake_render_tasks(layout, SAKE_PARAMS, SIMPLE_CHART_TEXT), workers,
+                              on_done=RenderProgress().done)
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"Wrote profile to {args.profile}")
+    if args.timings:
+        render.TIMINGS.dump(args.timings)
+        print(f"Wrote stage timings to {args.timings}")
+
+    print("...chart generation complete.")
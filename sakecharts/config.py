@@ -0,0 +1,214 @@
+"""Sake parameters, fonts and the ChartLayout shared by every renderer."""
+
+import os
+import zlib
+from dataclasses import dataclass
+from typing import List, Tuple
+
+
+# Sake parameters
+SAKE_PARAMS = {
+    "saketype": {"value": 45, "style": "solid"},  # 15:大吟醸 45:吟醸 52:特別純米 60:純米 76:普通
+    "rice": {"value": 50, "style": "dotted"},  # 18:山田錦 50:美山錦 80:五百万石
+    "fstarter": {"value": 70, "style": "solid"},  # 30:速醸酛 70:山廃 78:生酛
+    "yeast": {"value": 53, "style": "solid"},  # 12:1801 23:15(01) 38:9 50:7 53:6
+    "fruity_or_rich": {"value": 20, "style": "solid"},  # 0:Fruit 100:Rice
+    "amino": {"value": 82, "style": "solid"},  # 26:1 66:2 82:3
+    "acid": {"value": 67, "style": "dotted"},  # 13:4 15:3 26:2 67:1
+    "svm": {"value": 51, "style": "solid"},  # 15:-10 51:0 86:10
+    "dry_or_sweet": {"value": 100, "style": "solid"},  # 0:Dry 100:Sweet
+}
+
+# Text to display on the simple chart
+SIMPLE_CHART_TEXT = "獺祭45 BY24"
+
+# Directories searched (recursively) for fonts, in order: the "fonts" directory at the
+# repository root, next to the chart scripts and templates, so a font shipped with the
+# charts always wins, then the macOS, Windows and Linux system and per-user font directories.
+FONT_SEARCH_DIRS = [
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts"),
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+    os.path.expanduser("~/Library/Fonts"),
+    "C:/Windows/Fonts",
+    os.path.expanduser("~/.local/share/fonts"),
+    os.path.expanduser("~/.fonts"),
+    "/usr/local/share/fonts",
+    "/usr/share/fonts",
+]
+
+# Japanese-capable fonts tried (by file name) when none of the layout's fonts exist
+FALLBACK_FONT_NAMES = [
+    "Arial Unicode.ttf",
+    "meiryo.ttc",
+    "NotoSansCJK-Regular.ttc",
+    "NotoSansCJKjp-Regular.otf",
+    "NotoSansJP-Regular.otf",
+    "ipaexg.ttf",
+    "ipag.ttf",
+]
+
+# Latin-only fonts used (with a warning) when no Japanese-capable font exists; still
+# better than Pillow's bitmap default, but Japanese labels render as boxes
+LAST_RESORT_FONT_NAMES = [
+    "DejaVuSans.ttf",
+]
+
+
+class FontRegistry:
+    """
+    Resolves font files once and caches loaded fonts per (path, size, index).
+
+    Explicit paths are used when they exist; otherwise their file names and then
+    FALLBACK_FONT_NAMES are looked up in the search directories (scanned once).
+    LAST_RESORT_FONT_NAMES come after those and print the font-not-found warning.
+    """
+
+    def __init__(self, search_dirs: List[str] = None, fallback_names: List[str] = None,
+                 last_resort_names: List[str] = None):
+        self.search_dirs = FONT_SEARCH_DIRS if search_dirs is None else search_dirs
+        self.fallback_names = FALLBACK_FONT_NAMES if fallback_names is None else fallback_names
+        self.last_resort_names = LAST_RESORT_FONT_NAMES if last_resort_names is None else last_resort_names
+        self._file_index = None  # lower-case file name -> path
+        self._resolved = {}  # candidate paths -> resolved path or None
+        self._fonts = {}  # (path, size, index) -> font
+        self.hits = 0
+        self.misses = 0
+
+    def _index(self) -> dict:
+        if self._file_index is None:
+            self._file_index = {}
+            for font_dir in self.search_dirs:
+                for root, _, files in os.walk(font_dir):
+                    for file_name in files:
+                        self._file_index.setdefault(file_name.lower(), os.path.join(root, file_name))
+        return self._file_index
+
+    def _find(self, names: List[str]):
+        return next((self._index()[n.lower()] for n in names if n.lower() in self._index()), None)
+
+    def resolve(self, candidates: Tuple[str, ...]):
+        """Returns the first usable font file for the candidate paths, or None."""
+        if candidates not in self._resolved:
+            path = next((c for c in candidates if c and os.path.exists(c)), None)
+            if path is None:
+                path = self._find([os.path.basename(c) for c in candidates if c] + self.fallback_names)
+            if path is None:
+                path = self._find(self.last_resort_names)
+                fallback = (f"{os.path.basename(path)}, which cannot draw Japanese labels" if path
+                            else "default font")
+                print(f"Warning: Font file not found at {' or '.join(c for c in candidates if c)}. Using {fallback}.")
+            self._resolved[candidates] = path
+        return self._resolved[candidates]
+
+    def get_font(self, candidates: Tuple[str, ...], size: int, index: int = 0):
+        path = self.resolve(candidates)
+        key = (path, size, index)
+        font = self._fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+
+        self.misses += 1
+        from PIL import ImageFont
+
+        if path is None:
+            # Fallback to default font if no font file could be found
+            font = ImageFont.load_default()
+        else:
+            font = ImageFont.truetype(path, size, index=index)
+        self._fonts[key] = font
+        return font
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "fonts": len(self._fonts)}
+
+    def clear(self):
+        self._file_index = None
+        self._resolved.clear()
+        self._fonts.clear()
+        self.hits = self.misses = 0
+
+
+# Process-wide registry used by ChartLayout.get_font
+FONT_REGISTRY = FontRegistry()
+
+
+# zlib strategies selectable with ChartLayout.png_compress_strategy
+PNG_COMPRESS_STRATEGIES = {
+    "default": zlib.Z_DEFAULT_STRATEGY,
+    "filtered": zlib.Z_FILTERED,
+    "huffman": zlib.Z_HUFFMAN_ONLY,
+    "rle": zlib.Z_RLE,
+    "fixed": zlib.Z_FIXED,
+}
+
+
+# Chart layout and style settings
+@dataclass
+class ChartLayout:
+    # Simple chart (scatter plot)
+    simple_left: int = 274
+    simple_right: int = 835
+    simple_top: int = 110
+    simple_bottom: int = 608
+    star_size: int = 12
+
+    # Advanced charts (line graphs)
+    adv_left: int = 222
+    adv_right: int = 1270
+    adv_wine_yeast_offset: int = 22 # Offset for yeast line in wine chart
+    line_width: int = 8
+    line_color: str = "orange"
+    # Dotted line pattern (pixels). Dash and gap are stretched slightly so a whole
+    # number of periods fits each line; phase shifts the first dash along the line.
+    dash_length: float = 6
+    dash_gap: float = 6
+    dash_phase: float = 0
+
+    # Font settings
+    font_path: str = None  # Explicit font file (e.g. a bundled font); tried before the platform defaults
+    font_index: int = 0  # Face index inside .ttc collections
+    font_path_mac: str = "/Library/Fonts/Arial Unicode.ttf"
+    font_path_win: str = "C:/Windows/Fonts/meiryo.ttc"
+    font_size: int = 24
+    font_color: str = "black"
+
+    # Output encoding
+    output_format: str = "png"  # "png", "webp" (lossless), "avif" (quality 100, 4:4:4) or "svg"
+    png_compress_level: int = 6  # zlib level 0-9
+    png_compress_strategy: str = "default"  # zlib strategy: default, filtered, huffman, rle, fixed
+    png_optimize: bool = False
+    quantize_colors: int = 0  # If > 0, write a palette PNG with at most this many colors
+    drop_opaque_alpha: bool = False  # Write RGB instead of RGBA when the chart is fully opaque
+    # "full" writes composited charts; "overlay" writes transparent overlays cropped to the
+    # drawn lines/star/label plus a JSON offset, with the templates copied once to templates/
+    output_mode: str = "full"
+    svg_template_url: str = ""  # SVGs link templates at this URL prefix + file name; "" embeds them as data URIs
+
+    @property
+    def simple_width(self) -> int:
+        return self.simple_right - self.simple_left
+
+    @property
+    def simple_height(self) -> int:
+        return self.simple_bottom - self.simple_top
+
+    @property
+    def adv_width(self) -> int:
+        return self.adv_right - self.adv_left
+
+    def output_file(self, path: str) -> str:
+        """Returns path with the file extension of the configured output format (and "-overlay" in overlay mode)."""
+        suffix = "-overlay" if self.output_mode == "overlay" else ""
+        return os.path.splitext(path)[0] + suffix + "." + self.output_format.lower()
+
+    def _font_candidates(self) -> Tuple[str, ...]:
+        return self.font_path, self.font_path_mac, self.font_path_win
+
+    def font_file(self):
+        """Returns the font file labels are drawn with, or None for Pillow's default font."""
+        return FONT_REGISTRY.resolve(self._font_candidates())
+
+    def get_font(self):
+        return FONT_REGISTRY.get_font(self._font_candidates(), self.font_size, self.font_index)
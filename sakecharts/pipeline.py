@@ -0,0 +1,203 @@
+"""Streaming render pipeline: task reading, rendering and file writing as concurrent asyncio stages."""
+
+import asyncio
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
+from .batch import _encode_worker_task, create_render_pool, template_paths, write_render_output
+from .config import ChartLayout
+from .render import TIMINGS
+
+# Tasks pulled from the task iterator per hop to the reader thread
+READ_CHUNK = 16
+
+
+class PipelineStage:
+    """
+    Counters for one pipeline stage.
+
+    busy is time spent doing the stage's work, starved time waiting for input and blocked
+    time waiting for room in the next stage's queue. The input queue depth is sampled
+    every time the stage takes an item.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int = 0):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.starved_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.max_depth = 0
+
+    def summary(self, elapsed: float) -> dict:
+        capacity = elapsed * self.concurrency or 1.0
+        return {
+            "name": self.name,
+            "concurrency": self.concurrency,
+            "items": self.items,
+            "items_per_sec": self.items / elapsed if elapsed > 0 else 0.0,
+            "busy": self.busy_seconds / capacity,
+            "starved": self.starved_seconds / capacity,
+            "blocked": self.blocked_seconds / capacity,
+            "queue_size": self.queue_size,
+            "mean_queue_depth": self.depth_total / self.depth_samples if self.depth_samples else 0.0,
+            "max_queue_depth": self.max_depth,
+        }
+
+
+async def _take(queue: asyncio.Queue, stage: PipelineStage):
+    depth = queue.qsize()
+    stage.depth_total += depth
+    stage.depth_samples += 1
+    stage.max_depth = max(stage.max_depth, depth)
+    start_time = time.perf_counter()
+    item = await queue.get()
+    stage.starved_seconds += time.perf_counter() - start_time
+    return item
+
+
+async def _put(queue: asyncio.Queue, item, stage: PipelineStage):
+    start_time = time.perf_counter()
+    await queue.put(item)
+    stage.blocked_seconds += time.perf_counter() - start_time
+
+
+class RenderPipeline:
+    """
+    Renders a stream of tasks (see sake_render_tasks) with overlapping stages:
+
+        read (1 thread) -> [tasks] -> render + encode (process pool) -> [encoded] -> write (thread pool)
+
+    Both queues hold at most queue_size items and a full queue blocks the stage feeding it,
+    so at most about 2 * queue_size + workers + writers tasks or encoded charts are held
+    in memory however long the task iterator is. Per-stage counters are kept in stages.
+
+    sink writes one chart and takes the arguments of write_render_output (the default),
+    e.g. ChartArchiveWriter.write_chart.
+    """
+
+    def __init__(self, layout: ChartLayout, workers: int = None, writers: int = 4, queue_size: int = 32,
+                 sink=None):
+        self.layout = layout
+        self.sink = sink or write_render_output
+        self.workers = workers
+        self.writers = writers
+        self.queue_size = queue_size
+        self.stages = []
+        self.elapsed = 0.0
+
+    def run(self, tasks: Iterable[tuple], on_done=None) -> int:
+        """
+        Renders and writes every task. Returns the number of charts written.
+
+        on_done, if given, is called in this thread with a run_render_task style result for each written
+        chart, e.g. RenderProgress.done.
+        """
+        from .shared import SharedTemplateStore
+
+        start_time = time.perf_counter()
+        try:
+            with SharedTemplateStore(template_paths(self.layout)) as shared_templates, \
+                    create_render_pool(self.layout, self.workers, shared_templates) as pool, \
+                    ThreadPoolExecutor(self.writers, thread_name_prefix="chart-writer") as writer_pool:
+                self.stages = [
+                    PipelineStage("read", 1),
+                    PipelineStage("render", self.workers or os.cpu_count() or 1, self.queue_size),
+                    PipelineStage("write", self.writers, self.queue_size),
+                ]
+                return asyncio.run(self._run(iter(tasks), pool, writer_pool, on_done))
+        finally:
+            self.elapsed = time.perf_counter() - start_time
+
+    async def _run(self, tasks, pool, writer_pool, on_done) -> int:
+        read_stage, render_stage, write_stage = self.stages
+        task_queue = asyncio.Queue(self.queue_size)
+        encoded_queue = asyncio.Queue(self.queue_size)
+        loop = asyncio.get_running_loop()
+
+        async def read():
+            while True:
+                start_time = time.perf_counter()
+                chunk = await loop.run_in_executor(None, list, itertools.islice(tasks, READ_CHUNK))
+                read_stage.busy_seconds += time.perf_counter() - start_time
+                if not chunk:
+                    break
+                read_stage.items += len(chunk)
+                for task in chunk:
+                    await _put(task_queue, task, read_stage)
+
+        async def render_tasks():
+            while (task := await _take(task_queue, render_stage)) is not None:
+                start_time = time.perf_counter()
+                result = await loop.run_in_executor(pool, _encode_worker_task, task)
+                render_stage.busy_seconds += time.perf_counter() - start_time
+                render_stage.items += 1
+                await _put(encoded_queue, result, render_stage)
+
+        async def write():
+            while (result := await _take(encoded_queue, write_stage)) is not None:
+                chart_name, output_path, data, box, render_seconds, stages = result
+                start_time = time.perf_counter()
+                await loop.run_in_executor(writer_pool, self.sink, self.layout, chart_name,
+                                           output_path, data, box)
+                save_seconds = time.perf_counter() - start_time
+                write_stage.busy_seconds += save_seconds
+                write_stage.items += 1
+                if TIMINGS.enabled:
+                    TIMINGS.add(chart_name, {**stages, "save": save_seconds})
+                if on_done is not None:
+                    on_done((output_path, len(data), render_seconds, chart_name, stages))
+
+        async def close_after(coroutines, queue, consumers):
+            # A None per consumer ends the next stage once this one has drained
+            await asyncio.gather(*coroutines)
+            for _ in range(consumers):
+                await queue.put(None)
+
+        stages = [
+            asyncio.ensure_future(close_after([read()], task_queue, render_stage.concurrency)),
+            asyncio.ensure_future(close_after([render_tasks() for _ in range(render_stage.concurrency)],
+                                              encoded_queue, write_stage.concurrency)),
+            *(asyncio.ensure_future(write()) for _ in range(write_stage.concurrency)),
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            for stage in stages:
+                stage.cancel()
+            raise
+        return write_stage.items
+
+    def summary(self) -> List[dict]:
+        return [stage.summary(self.elapsed) for stage in self.stages]
+
+    def report(self) -> str:
+        """Describes each stage's throughput, utilization and input queue depth, and names the busiest stage."""
+        summaries = self.summary()
+        lines = ["Pipeline stages (busy / starved for input / blocked on output, as a share of stage capacity):"]
+        for stage in summaries:
+            queue = (f"queue {stage['mean_queue_depth']:.1f} avg, {stage['max_queue_depth']} max of {stage['queue_size']}"
+                     if stage["queue_size"] else "")
+            lines.append(f"  {stage['name']:<6} {stage['concurrency']:>2} x {stage['items']:>7} items "
+                         f"{stage['items_per_sec']:8.1f}/sec  busy {stage['busy']:4.0%}  starved {stage['starved']:4.0%}  "
+                         f"blocked {stage['blocked']:4.0%}  {queue}".rstrip())
+        if summaries:
+            bottleneck = max(summaries, key=lambda stage: stage["busy"])
+            lines.append(f"Bottleneck: {bottleneck['name']} (busy {bottleneck['busy']:.0%})")
+        return "\n".join(lines)
+
+
+def render_tasks_pipeline(layout: ChartLayout, tasks, workers: int = None, writers: int = 4, queue_size: int = 32,
+                          on_done=None) -> int:
+    """Renders tasks through a RenderPipeline, prints its stage report and returns the number of charts written."""
+    pipeline = RenderPipeline(layout, workers, writers, queue_size)
+    charts = pipeline.run(tasks, on_done)
+    print(pipeline.report())
+    return charts
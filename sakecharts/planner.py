@@ -0,0 +1,85 @@
+"""Vectorized line planning: the lines of every line chart for a whole catalog at once."""
+
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from .batch import PARAM_NAMES, iter_catalog
+from .charts import get_chart_defs
+from .config import ChartLayout
+from .render import LINE_STYLES
+
+# One planned line; style indexes LINE_STYLES (NO_STYLE for styles that are not drawn)
+LINE_PLAN_DTYPE = np.dtype([("x", "f8"), ("y_start", "i2"), ("y_end", "i2"), ("style", "u1")])
+
+NO_STYLE = 255
+
+STYLE_CODES = {style: code for code, style in enumerate(LINE_STYLES)}
+
+
+class LinePlan(NamedTuple):
+    """
+    Planned lines of every line chart for n sakes.
+
+    lines is an (n, total lines) LINE_PLAN_DTYPE array; charts maps each chart name to
+    its slice of the columns, in ChartDef and LineDef order.
+    """
+    lines: np.ndarray
+    charts: Dict[str, slice]
+
+    def chart(self, chart_name: str) -> np.ndarray:
+        """Returns the (n, lines) plan of one chart; row i is what render_planned_lines draws for sake i."""
+        return self.lines[:, self.charts[chart_name]]
+
+
+def params_columns(params_list: Iterable[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turns SAKE_PARAMS-style dicts into columns in PARAM_NAMES order.
+
+    Returns (values, styles): an (n, parameters) float array and an (n, parameters) array of style codes.
+    """
+    values, styles = [], []
+    for params in params_list:
+        values.append([params[name]["value"] for name in PARAM_NAMES])
+        styles.append([STYLE_CODES.get(params[name]["style"], NO_STYLE) for name in PARAM_NAMES])
+    return (np.array(values, dtype=float).reshape(-1, len(PARAM_NAMES)),
+            np.array(styles, dtype=np.uint8).reshape(-1, len(PARAM_NAMES)))
+
+
+def catalog_columns(catalog_path: str) -> Tuple[List[str], List[str], np.ndarray, np.ndarray]:
+    """Reads a catalog into (names, texts, values, styles), the last two as returned by params_columns."""
+    names, texts, params_list = [], [], []
+    for name, text, params in iter_catalog(catalog_path):
+        names.append(name)
+        texts.append(text)
+        params_list.append(params)
+    return (names, texts) + params_columns(params_list)
+
+
+def plan_chart_lines(layout: ChartLayout, values: np.ndarray, styles: np.ndarray) -> LinePlan:
+    """
+    Computes every line of every line chart for all sakes at once.
+
+    values and styles are (n, parameters) columns as returned by params_columns. Line
+    positions match get_chart_lines exactly; the LineDefs of all charts are laid out
+    side by side so the whole plan is filled by one gather per field.
+    """
+    values = np.asarray(values, dtype=float).reshape(-1, len(PARAM_NAMES))
+    styles = np.asarray(styles, dtype=np.uint8).reshape(-1, len(PARAM_NAMES))
+    charts = {}
+    param_index, y_start, y_end, x_offset = [], [], [], []
+    for chart_def in get_chart_defs(layout):
+        charts[chart_def.name] = slice(len(param_index), len(param_index) + len(chart_def.line_defs))
+        for line_def in chart_def.line_defs:
+            param_index.append(PARAM_NAMES.index(line_def.param_name))
+            y_start.append(line_def.y_start)
+            y_end.append(line_def.y_end)
+            x_offset.append(line_def.x_offset)
+
+    lines = np.empty((len(values), len(param_index)), dtype=LINE_PLAN_DTYPE)
+    # Same operation order as get_chart_lines, so the float results are identical
+    lines["x"] = layout.adv_left + (layout.adv_width * values[:, param_index] / 100) + np.array(x_offset)
+    lines["y_start"] = y_start
+    lines["y_end"] = y_end
+    lines["style"] = styles[:, param_index]
+    return LinePlan(lines, charts)
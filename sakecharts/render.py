@@ -0,0 +1,549 @@
+"""Raster drawing: template cache, line and star rendering, encoding and stage timings."""
+
+import io
+import json
+import math
+import os
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
+
+from .config import PNG_COMPRESS_STRATEGIES, ChartLayout
+
+
+# Replace per-chart "Saved ..." prints with a periodic progress line (set by main and pool workers)
+QUIET = False
+
+
+class RenderTimings:
+    """
+    Opt-in wall-time recorder for the stages of a render.
+
+    Stages are timed with `with TIMINGS.stage(name):` while enabled. run_render_task
+    collects the stages of each chart with take() and adds them under the chart
+    name, so timings from pool workers can be merged in the parent.
+    """
+
+    # Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+    BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
+
+    def __init__(self):
+        self.enabled = False
+        self._current = defaultdict(float)  # stage -> seconds for the chart being rendered
+        self.samples = defaultdict(lambda: defaultdict(list))  # chart -> stage -> [seconds]
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current[name] += time.perf_counter() - start_time
+
+    def take(self) -> dict:
+        """Returns and resets the stages recorded since the last call."""
+        stages, self._current = dict(self._current), defaultdict(float)
+        return stages
+
+    def add(self, chart_name: str, stages: dict):
+        for stage_name, seconds in stages.items():
+            self.samples[chart_name][stage_name].append(seconds)
+
+    def summary(self) -> dict:
+        """Aggregates the samples into count/total/percentiles and a millisecond histogram per chart and stage."""
+        result = {}
+        for chart_name, stages in self.samples.items():
+            result[chart_name] = {}
+            for stage_name, samples in stages.items():
+                ordered = sorted(samples)
+                histogram = [0] * (len(self.BUCKETS_MS) + 1)
+                for seconds in ordered:
+                    histogram[next((i for i, bound in enumerate(self.BUCKETS_MS) if seconds * 1000 <= bound),
+                                   len(self.BUCKETS_MS))] += 1
+                result[chart_name][stage_name] = {
+                    "count": len(ordered),
+                    "total_ms": sum(ordered) * 1000,
+                    "mean_ms": sum(ordered) / len(ordered) * 1000,
+                    "p50_ms": ordered[len(ordered) // 2] * 1000,
+                    "p90_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))] * 1000,
+                    "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+                    "max_ms": ordered[-1] * 1000,
+                    "histogram": {"buckets_ms": self.BUCKETS_MS, "counts": histogram},
+                }
+        return result
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+# Process-wide recorder used by the render functions
+TIMINGS = RenderTimings()
+
+
+class TemplateCache:
+    """
+    Keeps decoded base images in memory so each template PNG is only read once.
+
+    Entries are keyed by path and invalidated when the file's mtime changes.
+    The least recently used templates are evicted once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (mtime, image)
+        self._shared = set()  # paths whose image is owned elsewhere (see put_shared)
+        self._size = 0
+
+    def get(self, path: str) -> Image.Image:
+        """Returns a private RGBA copy of the template at path that the caller may draw on."""
+        mtime = os.path.getmtime(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            self._entries.move_to_end(path)
+            return entry[1].copy()
+
+        with Image.open(path) as src:
+            image = src.convert("RGBA")
+        self._store(path, mtime, image)
+        return image.copy()
+
+    def put_shared(self, path: str, mtime: float, image: Image.Image):
+        """
+        Serves path from an image owned elsewhere (e.g. shared memory) until the file changes.
+
+        Shared images do not count towards max_bytes and are never evicted.
+        """
+        self._discard(path)
+        self._entries[path] = (mtime, image)
+        self._shared.add(path)
+
+    def drop_shared(self):
+        """Forgets every image added with put_shared, so its owner can release the memory."""
+        for path in list(self._shared):
+            self._discard(path)
+
+    def size(self, path: str) -> Tuple[int, int]:
+        """Returns the template's (width, height), reading only the file header if it is not cached."""
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == os.path.getmtime(path):
+            return entry[1].size
+        with Image.open(path) as src:
+            return src.size
+
+    def clear(self):
+        self._entries.clear()
+        self._shared.clear()
+        self._size = 0
+
+    def _store(self, path: str, mtime: float, image: Image.Image):
+        self._discard(path)
+        nbytes = image.width * image.height * 4
+        if nbytes > self.max_bytes:
+            return  # Too large to cache; the caller still gets its copy
+        self._entries[path] = (mtime, image)
+        self._size += nbytes
+        while self._size > self.max_bytes:
+            self._discard(next(key for key in self._entries if key not in self._shared))
+
+    def _discard(self, path: str):
+        entry = self._entries.pop(path, None)
+        if path in self._shared:
+            self._shared.discard(path)
+        elif entry is not None:
+            self._size -= entry[1].width * entry[1].height * 4
+
+
+# Process-wide cache shared by all render functions
+TEMPLATE_CACHE = TemplateCache()
+
+
+class LabelBitmap(NamedTuple):
+    mask: Image.Image  # "L" coverage of the rendered text
+    offset: Tuple[int, int]  # Mask position relative to the whole-pixel part of the draw position
+
+
+def _font_key(font) -> tuple:
+    return getattr(font, "path", id(font)), getattr(font, "size", None), getattr(font, "index", 0)
+
+
+class LabelCache:
+    """
+    Shapes and rasterizes each label once and reuses the coverage mask.
+
+    Masks are keyed by (text, font, sub-pixel phase of the draw position) and are colorless,
+    so one entry serves every fill color. Drawing a cached mask with ImageDraw.bitmap gives
+    the same pixels as ImageDraw.text. measure() returns the text bbox without drawing,
+    for layout and collision checks. Least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> bbox or LabelBitmap
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: tuple, build):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        entry = self._entries[key] = build()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def measure(self, text: str, font) -> Tuple[int, int, int, int]:
+        """Returns the bbox of text drawn at (0, 0), like ImageDraw.textbbox."""
+        return self._lookup(("bbox", text, _font_key(font)), lambda: font.getbbox(text))
+
+    def get(self, text: str, font, phase: Tuple[float, float] = (0.0, 0.0)) -> LabelBitmap:
+        """Returns the mask of text drawn at a position whose fractional part is phase."""
+        def build():
+            bbox = self.measure(text, font)
+            # Keep the draw offsets non-negative: Pillow splits a negative coordinate into a
+            # different sub-pixel phase than the chart position would have
+            left, top = min(0, math.floor(bbox[0]) - 1), min(0, math.floor(bbox[1]) - 1)
+            mask = Image.new("L", (max(1, math.ceil(bbox[2]) + 2 - left), max(1, math.ceil(bbox[3]) + 2 - top)), 0)
+            ImageDraw.Draw(mask).text((phase[0] - left, phase[1] - top), text, fill=255, font=font)
+            return LabelBitmap(mask, (left, top))
+        return self._lookup(("mask", text, _font_key(font), phase), build)
+
+    def draw(self, draw: ImageDraw.ImageDraw, xy: Tuple[float, float], text: str, font, fill):
+        """Draws text at xy like ImageDraw.text, rasterizing it only on a cache miss."""
+        x_phase, x_whole = math.modf(xy[0])
+        y_phase, y_whole = math.modf(xy[1])
+        label = self.get(text, font, (x_phase, y_phase))
+        draw.bitmap((int(x_whole) + label.offset[0], int(y_whole) + label.offset[1]), label.mask, fill=fill)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+
+# Process-wide cache used for chart labels
+LABEL_CACHE = LabelCache()
+
+
+def encode_chart(layout: ChartLayout, image: Image.Image) -> bytes:
+    """Encodes a rendered chart according to the layout's output settings."""
+    if layout.drop_opaque_alpha and image.mode == "RGBA" and image.getchannel("A").getextrema()[0] == 255:
+        image = image.convert("RGB")
+
+    output_format = layout.output_format.lower()
+    buffer = io.BytesIO()
+    with TIMINGS.stage("encode"):
+        if output_format == "png":
+            if layout.quantize_colors:
+                image = image.quantize(layout.quantize_colors, method=Image.Quantize.FASTOCTREE)
+            image.save(buffer, "PNG",
+                       compress_level=layout.png_compress_level,
+                       compress_type=PNG_COMPRESS_STRATEGIES[layout.png_compress_strategy],
+                       optimize=layout.png_optimize)
+        elif output_format == "webp":
+            image.save(buffer, "WEBP", lossless=True)
+        elif output_format == "avif":
+            image.save(buffer, "AVIF", quality=100, subsampling="4:4:4")
+        else:
+            raise ValueError(f"Unsupported output format: {layout.output_format}")
+    return buffer.getvalue()
+
+
+def save_chart(layout: ChartLayout, image: Image.Image, output_path: str) -> Tuple[int, float]:
+    """Encodes and writes a chart. Returns (bytes written, encode seconds)."""
+    start_time = time.perf_counter()
+    data = encode_chart(layout, image)
+    encode_seconds = time.perf_counter() - start_time
+    with TIMINGS.stage("save"), open(output_path, "wb") as f:
+        f.write(data)
+    return len(data), encode_seconds
+
+
+def _star_and_label_positions(layout: ChartLayout, params: dict, text: str, font) -> tuple:
+    """
+    Returns the star centre, the label's draw position and the label's drawn bbox
+    for the simple chart, in template pixels.
+    """
+    # Calculate coordinates based on percentages
+    x_pct = params["dry_or_sweet"]["value"]
+    y_pct = params["fruity_or_rich"]["value"]
+    x = layout.simple_left + (layout.simple_width * x_pct / 100)
+    y = layout.simple_top + (layout.simple_height * y_pct / 100)
+
+    # Measured once per label and font (replaces deprecated textsize)
+    with TIMINGS.stage("text_layout"):
+        text_bbox = LABEL_CACHE.measure(text, font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+
+    text_x = x - (text_width / 2)
+    text_y = y - layout.star_size - text_height # Position text above the star
+    label_box = (text_x + text_bbox[0], text_y + text_bbox[1], text_x + text_bbox[2], text_y + text_bbox[3])
+    return (x, y), (text_x, text_y), label_box
+
+
+def _draw_star_and_label(image: Image.Image, layout: ChartLayout, star: Tuple[float, float],
+                         text_xy: Tuple[float, float], text: str, font, origin: Tuple[int, int] = (0, 0)):
+    """Draws the star marker and label; origin is the template pixel at the image's top-left corner."""
+    draw = ImageDraw.Draw(image)
+    x, y = star[0] - origin[0], star[1] - origin[1]
+    size = layout.star_size
+    with TIMINGS.stage("drawing"):
+        draw.polygon([(x - size, y), (x, y - size), (x + size, y), (x, y + size)], fill="blue")
+        LABEL_CACHE.draw(draw, (text_xy[0] - origin[0], text_xy[1] - origin[1]), text, font, layout.font_color)
+
+
+def render_sake_simple_chart(layout: ChartLayout, params: dict, text: str, base_image_path: str) -> Image.Image:
+    """Draws the simple sake chart with a star marker and text and returns the image without saving it."""
+    with TIMINGS.stage("template_load"):
+        image = TEMPLATE_CACHE.get(base_image_path)
+    with TIMINGS.stage("font_load"):
+        font = layout.get_font()
+    star, text_xy, _ = _star_and_label_positions(layout, params, text, font)
+    _draw_star_and_label(image, layout, star, text_xy, text, font)
+    return image
+
+
+def create_sake_simple_chart(layout: ChartLayout, params: dict, text: str, base_image_path: str, output_path: str):
+    """Creates the simple sake chart with a star marker and text."""
+    with render_sake_simple_chart(layout, params, text, base_image_path) as image:
+        nbytes, encode_seconds = save_chart(layout, image, output_path)
+        if not QUIET:
+            print(f"Saved simple chart to {output_path} ({nbytes} bytes, encoded in {encode_seconds * 1000:.1f} ms)")
+        # image.show() # Uncomment for testing
+        return nbytes, encode_seconds
+
+def _dash_mask(start: Tuple[float, float], end: Tuple[float, float], width: int,
+               dash: float, gap: float, phase: float):
+    """
+    Rasterizes every dash of a dotted line at once.
+
+    Returns the top-left corner and an "L" mask covering the line's bounding box,
+    or None if the line is too short to hold a single dash.
+    """
+    dx, dy = end[0] - start[0], end[1] - start[1]
+    line_length = (dx**2 + dy**2)**0.5
+    dots = int(line_length / (dash + gap))
+    if dots == 0:
+        return None
+    period = line_length / dots
+    on_length = period * dash / (dash + gap)
+
+    half = width / 2
+    left = int(np.floor(min(start[0], end[0]) - half))
+    top = int(np.floor(min(start[1], end[1]) - half))
+    right = int(np.ceil(max(start[0], end[0]) + half))
+    bottom = int(np.ceil(max(start[1], end[1]) + half))
+    xs = np.arange(left, right + 1, dtype=np.float32)
+    ys = np.arange(top, bottom + 1, dtype=np.float32)
+
+    def on_dash(t):
+        # Dashes are widened by half a pixel at each end to match ImageDraw.line's inclusive endpoints
+        t = t + 0.5
+        return (t >= 0) & (t < line_length) & (np.mod(t - phase, period) < on_length + 1)
+
+    # Axis-aligned lines (all chart lines) separate into a row profile and a column profile
+    if dx == 0:
+        mask = on_dash((ys - start[1]) * np.sign(dy))[:, None] & (np.abs(xs - start[0]) < half)[None, :]
+    elif dy == 0:
+        mask = (np.abs(ys - start[1]) < half)[:, None] & on_dash((xs - start[0]) * np.sign(dx))[None, :]
+    else:
+        # Position along the line (t) and signed distance from it (d) for every pixel centre
+        ux, uy = dx / line_length, dy / line_length
+        rx, ry = xs[None, :] - start[0], ys[:, None] - start[1]
+        mask = on_dash(rx * ux + ry * uy) & (np.abs(ry * ux - rx * uy) < half)
+
+    return (left, top), Image.fromarray(mask.astype(np.uint8) * 255)
+
+
+def _draw_dotted_line(draw, start: Tuple[float, float], end: Tuple[float, float], color: str, width: int,
+                      dash: float = 6, gap: float = 6, phase: float = 0):
+    """Helper function to draw a dotted line with a single bitmap composite."""
+    dash_mask = _dash_mask(start, end, width, dash, gap, phase)
+    if dash_mask is None:
+        return
+    origin, mask = dash_mask
+    draw.bitmap(origin, mask, fill=color)
+
+
+def _dash_rows(length: int, dash: float, gap: float, phase: float) -> np.ndarray:
+    """
+    Marks the pixels covered by dashes along a line of integer length.
+
+    Matches the dash boundaries ImageDraw.line produces for the same pattern
+    (endpoints truncated to whole pixels, both ends inclusive).
+    """
+    rows = np.zeros(length + 1, dtype=bool)
+    dots = int(length / (dash + gap))
+    if dots == 0:
+        return rows
+    phase = phase % (length / dots)
+    on_fraction = dash / (dash + gap)
+
+    i = np.arange(-1, dots + 1)
+    starts = phase + length * i / dots
+    ends = phase + length * (i + on_fraction) / dots
+    keep = (ends > 0) & (starts < length)
+    starts = np.clip(np.floor(starts[keep]).astype(int), 0, length)
+    ends = np.clip(np.floor(ends[keep]).astype(int), 0, length)
+
+    delta = np.zeros(length + 2, dtype=int)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, ends + 1, -1)
+    return np.cumsum(delta)[:length + 1] > 0
+
+
+@lru_cache(maxsize=256)
+def _line_sprite(length: int, width: int, color: str, style: str, dash: float, gap: float, phase: float):
+    """
+    Rasterizes a vertical line of the given length once and returns (stamp, mask).
+
+    The mask is None for fully opaque stamps, which can then be pasted directly.
+    Returns None for unknown styles.
+    """
+    rgba = ImageColor.getcolor(color, "RGBA")
+    if style == "solid":
+        return Image.new("RGBA", (width, length + 1), rgba), None
+    if style == "dotted":
+        pixels = np.zeros((length + 1, width, 4), dtype=np.uint8)
+        pixels[_dash_rows(length, dash, gap, phase)] = rgba
+        stamp = Image.fromarray(pixels)
+        return stamp, stamp
+    return None
+
+
+def _paste_vertical_line(img: Image.Image, layout: ChartLayout, x: float, y_start: float, y_end: float, style: str):
+    """Blits a cached line sprite at the position ImageDraw.line would have drawn it."""
+    top = int(y_start)
+    sprite = _line_sprite(int(y_end) - top, layout.line_width, layout.line_color, style,
+                          layout.dash_length, layout.dash_gap, layout.dash_phase)
+    if sprite is None:
+        return
+    stamp, mask = sprite
+    img.paste(stamp, (int(x) - (layout.line_width - 1) // 2, top), mask)
+
+
+def _draw_lines(img: Image.Image, layout: ChartLayout, lines: List[dict], origin: Tuple[int, int] = (0, 0)):
+    """Draws chart lines; origin is the template pixel at the image's top-left corner."""
+    draw = ImageDraw.Draw(img)
+    with TIMINGS.stage("line_drawing"):
+        for line_info in lines:
+            start = (line_info["start"][0] - origin[0], line_info["start"][1] - origin[1])
+            end = (line_info["end"][0] - origin[0], line_info["end"][1] - origin[1])
+            line_type = line_info["style"]
+            
+            if start[0] == end[0] and start[1] <= end[1]:
+                # Chart lines are vertical, so they can be pasted from the sprite cache
+                _paste_vertical_line(img, layout, start[0], start[1], end[1], line_type)
+            elif line_type == "solid":
+                draw.line([start, end], fill=layout.line_color, width=layout.line_width)
+            elif line_type == "dotted":
+                _draw_dotted_line(draw, start, end, color=layout.line_color, width=layout.line_width,
+                                  dash=layout.dash_length, gap=layout.dash_gap, phase=layout.dash_phase)
+
+
+def render_chart_lines(layout: ChartLayout, lines: List[dict], base_image_path: str) -> Image.Image:
+    """Draws solid or dotted lines on a base image and returns the image without saving it."""
+    with TIMINGS.stage("template_load"):
+        img = TEMPLATE_CACHE.get(base_image_path)
+    _draw_lines(img, layout, lines)
+    return img
+
+
+# Line styles by the code stored in line plans (see planner.plan_chart_lines); other codes are not drawn
+LINE_STYLES = ("solid", "dotted")
+
+
+def render_planned_lines(layout: ChartLayout, lines: np.ndarray, base_image_path: str) -> Image.Image:
+    """
+    Like render_chart_lines, for one sake's lines of a chart taken from a line plan
+    (records with x, y_start, y_end and style fields).
+    """
+    with TIMINGS.stage("template_load"):
+        img = TEMPLATE_CACHE.get(base_image_path)
+    with TIMINGS.stage("line_drawing"):
+        for x, y_start, y_end, style in lines[["x", "y_start", "y_end", "style"]].tolist():
+            if style < len(LINE_STYLES):
+                _paste_vertical_line(img, layout, x, y_start, y_end, LINE_STYLES[style])
+    return img
+
+
+def draw_chart_lines(layout: ChartLayout, lines: List[dict], base_image_path: str, output_path: str):
+    """Draws solid or dotted lines on a base image for advanced charts."""
+    with render_chart_lines(layout, lines, base_image_path) as img:
+        nbytes, encode_seconds = save_chart(layout, img, output_path)
+        if not QUIET:
+            print(f"Saved chart to {output_path} ({nbytes} bytes, encoded in {encode_seconds * 1000:.1f} ms)")
+        # img.show() # Uncomment for testing
+        return nbytes, encode_seconds
+
+
+# --- Overlays ---
+
+def _overlay_canvas(box: Tuple[float, float, float, float], template_size: Tuple[int, int]):
+    """Returns a transparent canvas covering box (clipped to the template) and its template origin."""
+    left = max(0, math.floor(box[0]))
+    top = max(0, math.floor(box[1]))
+    right = min(template_size[0], math.ceil(box[2]))
+    bottom = min(template_size[1], math.ceil(box[3]))
+    return Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0)), (left, top)
+
+
+def _crop_overlay(canvas: Image.Image, origin: Tuple[int, int]) -> Tuple[Image.Image, Tuple[int, int]]:
+    """Crops a canvas to its drawn pixels, returning the overlay and its offset on the template."""
+    bbox = canvas.getbbox()
+    if bbox is None:
+        return canvas.crop((0, 0, 1, 1)), origin
+    return canvas.crop(bbox), (origin[0] + bbox[0], origin[1] + bbox[1])
+
+
+def render_sake_simple_overlay(layout: ChartLayout, params: dict, text: str,
+                               base_image_path: str) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Draws only the simple chart's star and label onto a transparent image cropped to them.
+
+    Returns (overlay, (left, top)); placing the overlay at that offset over the template
+    gives the same chart as render_sake_simple_chart.
+    """
+    with TIMINGS.stage("font_load"):
+        font = layout.get_font()
+    star, text_xy, label_box = _star_and_label_positions(layout, params, text, font)
+    size = layout.star_size
+    box = (min(star[0] - size, label_box[0]) - 1, min(star[1] - size, label_box[1]) - 1,
+           max(star[0] + size, label_box[2]) + 2, max(star[1] + size, label_box[3]) + 2)
+    canvas, origin = _overlay_canvas(box, TEMPLATE_CACHE.size(base_image_path))
+    _draw_star_and_label(canvas, layout, star, text_xy, text, font, origin)
+    return _crop_overlay(canvas, origin)
+
+
+def render_chart_lines_overlay(layout: ChartLayout, lines: List[dict],
+                               base_image_path: str) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Draws only the chart lines onto a transparent image cropped to them.
+
+    Returns (overlay, (left, top)); placing the overlay at that offset over the template
+    gives the same chart as render_chart_lines.
+    """
+    if not lines:
+        return Image.new("RGBA", (1, 1), (0, 0, 0, 0)), (0, 0)
+    xs = [point[0] for line_info in lines for point in (line_info["start"], line_info["end"])]
+    ys = [point[1] for line_info in lines for point in (line_info["start"], line_info["end"])]
+    reach = layout.line_width + 1
+    canvas, origin = _overlay_canvas((min(xs) - reach, min(ys) - reach, max(xs) + reach, max(ys) + reach),
+                                     TEMPLATE_CACHE.size(base_image_path))
+    _draw_lines(canvas, layout, lines, origin)
+    return _crop_overlay(canvas, origin)
+
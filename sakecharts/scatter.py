@@ -0,0 +1,265 @@
+"""Multi-sake plots on the simple chart template: scatter with label placement, and density heatmaps."""
+
+import math
+import time
+from collections import defaultdict
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .batch import SIMPLE_CHART_BASE_IMAGE, iter_catalog
+from .config import ChartLayout
+from .render import LABEL_CACHE, TEMPLATE_CACHE, TIMINGS, save_chart
+
+# Label anchors tried around each star, in order of preference, as (dx, dy) multipliers:
+# the label box's centre is placed at star + (dx * (w/2 + gap), dy * (h/2 + gap)).
+LABEL_CANDIDATES = [(0, -1), (0, 1), (1, 0), (-1, 0), (1, -1), (-1, -1), (1, 1), (-1, 1)]
+
+# Distances (in star sizes) tried for labels that need a leader line
+LEADER_DISTANCES = [3, 5]
+
+LEADER_COLOR = (128, 128, 128, 255)
+
+# Density colormap anchors as (position, (r, g, b, a)); interpolated into a 256-entry lookup table
+DENSITY_COLORMAP = [
+    (0.0, (0, 0, 255, 0)),
+    (0.15, (0, 96, 255, 110)),
+    (0.4, (0, 220, 200, 170)),
+    (0.7, (255, 220, 0, 200)),
+    (1.0, (230, 0, 0, 230)),
+]
+
+
+class LabelGrid:
+    """
+    Uniform-grid spatial index of axis-aligned boxes.
+
+    Each box is registered in every cell it overlaps, so a collision test only looks at
+    the boxes sharing a cell with the query instead of every box placed so far.
+    """
+
+    def __init__(self, cell_size: float = 32):
+        self.cell_size = cell_size
+        self._cells = defaultdict(list)  # (column, row) -> [box]
+        self.checks = 0
+
+    def _cell_range(self, box: Tuple[float, float, float, float]):
+        size = self.cell_size
+        for column in range(math.floor(box[0] / size), math.floor(box[2] / size) + 1):
+            for row in range(math.floor(box[1] / size), math.floor(box[3] / size) + 1):
+                yield column, row
+
+    def collides(self, box: Tuple[float, float, float, float]) -> bool:
+        for cell in self._cell_range(box):
+            for other in self._cells.get(cell, ()):
+                self.checks += 1
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    return True
+        return False
+
+    def add(self, box: Tuple[float, float, float, float]):
+        for cell in self._cell_range(box):
+            self._cells[cell].append(box)
+
+
+def _star_positions(layout: ChartLayout, entries: List[tuple]) -> np.ndarray:
+    """Returns an (n, 2) array of star centres in template pixels."""
+    values = np.array([(params["dry_or_sweet"]["value"], params["fruity_or_rich"]["value"])
+                       for _, params in entries], dtype=float).reshape(-1, 2)
+    return np.column_stack([layout.simple_left + layout.simple_width * values[:, 0] / 100,
+                            layout.simple_top + layout.simple_height * values[:, 1] / 100])
+
+
+def place_labels(layout: ChartLayout, stars: np.ndarray, sizes: List[Tuple[int, int]],
+                 bounds: Tuple[int, int]) -> List[dict]:
+    """
+    Greedily places one label per star, earlier stars first.
+
+    Each label tries the LABEL_CANDIDATES next to its star, then the same directions
+    LEADER_DISTANCES star sizes away (drawn with a leader line). Labels that fit nowhere
+    inside bounds without overlapping a star or an earlier label are dropped.
+
+    Returns one dict per star with "box" (left, top, right, bottom) or None, and "leader".
+    """
+    size = layout.star_size
+    median_height = sorted(height for _, height in sizes)[len(sizes) // 2] if sizes else size
+    grid = LabelGrid(cell_size=max(2 * size, median_height * 2))
+    for x, y in stars:
+        grid.add((x - size, y - size, x + size, y + size))
+
+    gap = 2
+    placements = []
+    for (x, y), (width, height) in zip(stars, sizes):
+        placement = {"box": None, "leader": False}
+        for distance, leader in [(size, False)] + [(size * d, True) for d in LEADER_DISTANCES]:
+            for dx, dy in LABEL_CANDIDATES:
+                centre_x = x + dx * (width / 2 + distance + gap)
+                centre_y = y + dy * (height / 2 + distance + gap)
+                box = (centre_x - width / 2, centre_y - height / 2, centre_x + width / 2, centre_y + height / 2)
+                if box[0] < 0 or box[1] < 0 or box[2] > bounds[0] or box[3] > bounds[1] or grid.collides(box):
+                    continue
+                grid.add(box)
+                placement = {"box": box, "leader": leader}
+                break
+            if placement["box"] is not None:
+                break
+        placements.append(placement)
+    return placements
+
+
+def _star_sprite(size: int) -> np.ndarray:
+    """Alpha mask of one star marker centred in a (2 * size + 1) square."""
+    sprite = Image.new("L", (2 * size + 1, 2 * size + 1), 0)
+    ImageDraw.Draw(sprite).polygon([(0, size), (size, 0), (2 * size, size), (size, 2 * size)], fill=255)
+    return np.asarray(sprite)
+
+
+def _star_mask(layout: ChartLayout, stars: np.ndarray, image_size: Tuple[int, int]) -> Image.Image:
+    """Stamps every star into one full-size alpha mask so they are composited in a single paste."""
+    width, height = image_size
+    size = layout.star_size
+    sprite = _star_sprite(size)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for x, y in np.rint(stars).astype(int):
+        left, top = x - size, y - size
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + sprite.shape[1], width), min(top + sprite.shape[0], height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        region = mask[y0:y1, x0:x1]
+        np.maximum(region, sprite[y0 - top:y1 - top, x0 - left:x1 - left], out=region)
+    return Image.fromarray(mask)
+
+
+def _leader_end(star: Tuple[float, float], box: Tuple[float, float, float, float]) -> Tuple[float, float]:
+    """Point on the label box closest to the star."""
+    return min(max(star[0], box[0]), box[2]), min(max(star[1], box[1]), box[3])
+
+
+def render_scatter_chart(layout: ChartLayout, entries: Iterable[tuple],
+                         base_image_path: str) -> Tuple[Image.Image, List[dict]]:
+    """
+    Plots many sakes on the simple chart template.
+
+    entries are (label text, params) pairs; earlier entries get the better label spots.
+    Returns the image and one placement dict per entry (see place_labels) with its "text" and "star".
+    """
+    entries = list(entries)
+    with TIMINGS.stage("template_load"):
+        image = TEMPLATE_CACHE.get(base_image_path)
+    with TIMINGS.stage("font_load"):
+        font = layout.get_font()
+
+    stars = _star_positions(layout, entries)
+    with TIMINGS.stage("text_layout"):
+        bboxes = [LABEL_CACHE.measure(text, font) for text, _ in entries]
+        sizes = [(bbox[2] - bbox[0], bbox[3] - bbox[1]) for bbox in bboxes]
+        placements = place_labels(layout, stars, sizes, image.size)
+
+    draw = ImageDraw.Draw(image)
+    with TIMINGS.stage("drawing"):
+        for (x, y), placement in zip(stars, placements):
+            if placement["leader"]:
+                draw.line([(x, y), _leader_end((x, y), placement["box"])], fill=LEADER_COLOR, width=1)
+        image.paste("blue", (0, 0), _star_mask(layout, stars, image.size))
+        for (text, _), bbox, placement in zip(entries, bboxes, placements):
+            if placement["box"] is not None:
+                left, top = placement["box"][:2]
+                LABEL_CACHE.draw(draw, (left - bbox[0], top - bbox[1]), text, font, layout.font_color)
+
+    for (text, _), (x, y), placement in zip(entries, stars, placements):
+        placement.update(text=text, star=(float(x), float(y)))
+    return image, placements
+
+
+def render_catalog_scatter(catalog_path: str, output_path: str, layout: ChartLayout = None) -> List[dict]:
+    """Plots every sake of a catalog on one simple chart, saves it and reports label placement."""
+    layout = layout or ChartLayout()
+    start_time = time.perf_counter()
+    entries = [(text, params) for _, text, params in iter_catalog(catalog_path)]
+    image, placements = render_scatter_chart(layout, entries, SIMPLE_CHART_BASE_IMAGE)
+    with image:
+        nbytes, _ = save_chart(layout, image, output_path)
+    TIMINGS.add("sake_scatter", TIMINGS.take())
+    elapsed = time.perf_counter() - start_time
+
+    leaders = sum(1 for placement in placements if placement["leader"])
+    dropped = sum(1 for placement in placements if placement["box"] is None)
+    print(f"Plotted {len(placements)} sakes to {output_path} ({nbytes} bytes) in {elapsed:.2f}s: "
+          f"{len(placements) - leaders - dropped} labels placed, {leaders} with leader lines, {dropped} dropped")
+    return placements
+
+
+# --- Density Heatmap ---
+
+def _colormap_lut(anchors: List[tuple]) -> np.ndarray:
+    """Interpolates colormap anchors into a (256, 4) uint8 lookup table."""
+    positions = [position for position, _ in anchors]
+    steps = np.linspace(0, 1, 256)
+    return np.stack([np.interp(steps, positions, [color[channel] for _, color in anchors])
+                     for channel in range(4)], axis=1).round().astype(np.uint8)
+
+
+def _gaussian_blur(grid: np.ndarray, sigma: float) -> np.ndarray:
+    """Separable Gaussian blur of a 2-D array (sigma in cells), zero outside the grid."""
+    if sigma <= 0:
+        return grid
+    radius = max(1, int(3 * sigma))
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-offsets ** 2 / (2 * sigma ** 2))
+    kernel /= kernel.sum()
+    # mode="same" returns max(len(a), len(kernel)) values, so take the centre of the full
+    # convolution to keep the grid's shape when the kernel is longer than an axis
+    def blur(values):
+        return np.convolve(values, kernel, mode="full")[radius:radius + len(values)]
+
+    grid = np.apply_along_axis(blur, 0, grid)
+    return np.apply_along_axis(blur, 1, grid)
+
+
+def render_density_chart(layout: ChartLayout, values: np.ndarray, base_image_path: str,
+                         cell_size: int = 6, smooth: float = 1.5) -> Image.Image:
+    """
+    Draws the density of many sakes as a heatmap inside the simple chart's plot area.
+
+    values is an (n, 2) array of (dry_or_sweet, fruity_or_rich) percentages. They are
+    binned into cell_size pixel cells, blurred by smooth cells, mapped through
+    DENSITY_COLORMAP on a log scale and composited over the template in one operation,
+    so everything after binning costs the same for any number of sakes.
+    """
+    columns = max(1, layout.simple_width // cell_size)
+    rows = max(1, layout.simple_height // cell_size)
+    values = np.asarray(values, dtype=float).reshape(-1, 2)
+    with TIMINGS.stage("binning"):
+        # histogram2d's first axis is x, so transpose to rows (y) by columns (x)
+        counts, _, _ = np.histogram2d(values[:, 0], values[:, 1], bins=(columns, rows), range=[[0, 100], [0, 100]])
+        density = _gaussian_blur(counts.T, smooth)
+
+    with TIMINGS.stage("drawing"):
+        peak = density.max()
+        scaled = np.log1p(density) / np.log1p(peak) if peak > 0 else density
+        heat = Image.fromarray(_colormap_lut(DENSITY_COLORMAP)[(scaled * 255).astype(np.uint8)])
+        heat = heat.resize((layout.simple_width, layout.simple_height), Image.Resampling.BILINEAR)
+
+    with TIMINGS.stage("template_load"):
+        image = TEMPLATE_CACHE.get(base_image_path)
+    with TIMINGS.stage("drawing"):
+        image.alpha_composite(heat, (layout.simple_left, layout.simple_top))
+    return image
+
+
+def render_catalog_density(catalog_path: str, output_path: str, layout: ChartLayout = None,
+                           cell_size: int = 6, smooth: float = 1.5) -> int:
+    """Renders the density of every sake in a catalog on one simple chart and saves it. Returns the sake count."""
+    layout = layout or ChartLayout()
+    start_time = time.perf_counter()
+    values = np.array([(params["dry_or_sweet"]["value"], params["fruity_or_rich"]["value"])
+                       for _, _, params in iter_catalog(catalog_path)], dtype=float).reshape(-1, 2)
+    with render_density_chart(layout, values, SIMPLE_CHART_BASE_IMAGE, cell_size, smooth) as image:
+        nbytes, _ = save_chart(layout, image, output_path)
+    TIMINGS.add("sake_density", TIMINGS.take())
+    print(f"Plotted the density of {len(values)} sakes to {output_path} ({nbytes} bytes) "
+          f"in {time.perf_counter() - start_time:.2f}s")
+    return len(values)
+
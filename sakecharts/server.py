@@ -0,0 +1,141 @@
+"""On-demand chart HTTP server."""
+
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .batch import (PARAM_NAMES, SIMPLE_CHART_NAME, EncodedChartCache, chart_cache_key, chart_names,
+                    render_chart_bytes_cached, template_paths)
+from .config import SAKE_PARAMS, SIMPLE_CHART_TEXT, ChartLayout
+from .render import TEMPLATE_CACHE
+
+
+CONTENT_TYPES = {"png": "image/png", "webp": "image/webp", "avif": "image/avif", "svg": "image/svg+xml",
+                 "json": "application/json"}
+
+# Longest label accepted in the text query parameter
+MAX_TEXT_LENGTH = 100
+
+
+def params_from_query(query: dict) -> Tuple[str, dict, str]:
+    """
+    Parses (chart name, params, text) from URL query values as returned by parse_qs.
+
+    Parameters not given in the query keep their SAKE_PARAMS defaults. Values must be
+    percentages from 0 to 100 and text at most MAX_TEXT_LENGTH characters.
+    """
+    def first(key, default=None):
+        values = query.get(key)
+        return values[0] if values else default
+
+    params = {}
+    for name in PARAM_NAMES:
+        style = first(f"{name}_style", SAKE_PARAMS[name]["style"])
+        if style not in ("solid", "dotted"):
+            raise ValueError(f"Invalid style for '{name}': {style}")
+        value = float(first(name, SAKE_PARAMS[name]["value"]))
+        # Also rejects nan, which fails every comparison
+        if not 0 <= value <= 100:
+            raise ValueError(f"Value for '{name}' must be between 0 and 100: {value}")
+        params[name] = {"value": value, "style": style}
+    text = first("text", SIMPLE_CHART_TEXT)
+    if len(text) > MAX_TEXT_LENGTH:
+        raise ValueError(f"Text must be at most {MAX_TEXT_LENGTH} characters")
+    return first("chart", SIMPLE_CHART_NAME), params, text
+
+
+class ChartRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves GET /chart?chart=<name>&<param>=<value>&<param>_style=<style>&text=<label>,
+    and GET /archive/<member> from a pre-rendered archive if one was given. HEAD requests
+    get the same status and headers without the body.
+
+    The server object provides layout, cache, render_lock and archive (see create_chart_server).
+    """
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/charts":
+            self._send(200, "application/json", json.dumps(chart_names(self.server.layout)).encode("utf-8"))
+            return
+        if url.path.startswith("/archive/") and self.server.archive is not None:
+            name = unquote(url.path[len("/archive/"):])
+            if name not in self.server.archive:
+                self._send(404, "text/plain; charset=utf-8", b"Not found")
+                return
+            content_type = CONTENT_TYPES.get(os.path.splitext(name)[1][1:].lower(), "application/octet-stream")
+            self._send(200, content_type, self.server.archive.read(name))
+            return
+        if url.path != "/chart":
+            self._send(404, "text/plain; charset=utf-8", b"Not found")
+            return
+
+        try:
+            chart_name, params, text = params_from_query(parse_qs(url.query))
+            if chart_name not in self.server.chart_names:
+                raise ValueError(f"Unknown chart: {chart_name}")
+        except ValueError as e:
+            self._send(400, "text/plain; charset=utf-8", str(e).encode("utf-8"))
+            return
+
+        try:
+            key = chart_cache_key(self.server.layout, chart_name, params, text)
+            etag = '"' + hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, None, b"", etag)
+                return
+
+            # Renders share the process-wide template, sprite and font caches, so run them one at a time
+            with self.server.render_lock:
+                data = render_chart_bytes_cached(self.server.layout, params, chart_name, text, self.server.cache)
+        except OSError as e:
+            # Missing or unreadable template
+            self._send(500, "text/plain; charset=utf-8", f"Cannot render {chart_name}: {e}".encode("utf-8"))
+            return
+        self._send(200, CONTENT_TYPES[self.server.layout.output_format.lower()], data, etag)
+
+    do_HEAD = do_GET
+
+    def _send(self, status: int, content_type: str, body: bytes, etag: str = None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "public, max-age=86400")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the terminal quiet under load
+
+
+def create_chart_server(layout: ChartLayout, host: str = "127.0.0.1", port: int = 8000,
+                        cache_entries: int = 1024, archive_path: str = None) -> ThreadingHTTPServer:
+    """
+    Creates the chart HTTP server with templates and fonts already loaded.
+
+    With archive_path, the members of that ChartArchiveWriter archive are also served at /archive/<name>.
+    """
+    server = ThreadingHTTPServer((host, port), ChartRequestHandler)
+    server.archive = None
+    if archive_path:
+        from .archive import ChartArchive
+
+        server.archive = ChartArchive(archive_path)
+    server.layout = layout
+    server.chart_names = set(chart_names(layout))
+    server.cache = EncodedChartCache(cache_entries)
+    server.render_lock = threading.Lock()
+
+    # Warm the template and font caches so the first request does not pay for decoding
+    for path in template_paths(layout):
+        TEMPLATE_CACHE.get(path)
+    layout.get_font()
+    return server
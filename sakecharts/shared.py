@@ -0,0 +1,94 @@
+"""Shared-memory template store so pool workers do not each hold a decoded copy of every template."""
+
+import atexit
+import os
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .render import TEMPLATE_CACHE, TemplateCache
+
+# Blocks attached in this process; kept referenced so the mapped memory outlives the cache entries
+_attached = []
+
+
+class SharedTemplateStore:
+    """
+    Decodes each template once, in the creating process, into a shared memory block.
+
+    descriptors is a picklable list of (path, mtime, block name, size) for attach_shared_templates.
+    The creating process owns the blocks and must close() the store (or use it as a context
+    manager) once the workers are done.
+    """
+
+    def __init__(self, paths: List[str]):
+        self._blocks = []
+        self.descriptors = []
+        try:
+            for path in dict.fromkeys(paths):
+                mtime = os.path.getmtime(path)
+                with Image.open(path) as src:
+                    image = src.convert("RGBA")
+                block = SharedMemory(create=True, size=image.width * image.height * 4)
+                self._blocks.append(block)
+                np.ndarray((image.height, image.width, 4), dtype=np.uint8, buffer=block.buf)[:] = np.asarray(image)
+                self.descriptors.append((path, mtime, block.name, image.size))
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def nbytes(self) -> int:
+        return sum(block.size for block in self._blocks)
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _open_block(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Pool workers share the creating process's resource tracker, which already holds the
+        # block and unlinks it at most once; unregistering here would break the owner's unlink
+        return SharedMemory(name=name)
+
+
+def attach_shared_templates(descriptors: List[Tuple[str, float, str, Tuple[int, int]]],
+                            cache: TemplateCache = TEMPLATE_CACHE):
+    """
+    Serves the templates of a SharedTemplateStore from cache without copying them.
+
+    The shared pixels are wrapped as read-only images; renders still get a private copy from cache.get.
+    The blocks are detached again when the process exits (see detach_shared_templates).
+    """
+    if not _attached:
+        atexit.register(detach_shared_templates, cache)
+    for path, mtime, name, size in descriptors:
+        block = _open_block(name)
+        _attached.append(block)
+        image = Image.frombuffer("RGBA", size, block.buf, "raw", "RGBA", 0, 1)
+        cache.put_shared(path, mtime, image)
+
+
+def detach_shared_templates(cache: TemplateCache = TEMPLATE_CACHE):
+    """
+    Drops the shared images from cache and closes the attached blocks.
+
+    The images export the blocks' buffers, and a block with an exported buffer cannot be
+    closed, so the cache entries have to go first.
+    """
+    cache.drop_shared()
+    while _attached:
+        _attached.pop().close()
@@ -0,0 +1,100 @@
+"""SVG backend: charts as vector lines, star and label over a linked or embedded template."""
+
+import base64
+import os
+import struct
+from functools import lru_cache
+from typing import List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from .config import ChartLayout
+
+# CSS font stack for the label; browsers pick the first installed Japanese-capable face
+SVG_FONT_FAMILY = "'Hiragino Sans', Meiryo, 'Noto Sans CJK JP', 'Noto Sans JP', sans-serif"
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@lru_cache(maxsize=64)
+def _png_size(path: str, mtime: float) -> Tuple[int, int]:
+    with open(path, "rb") as f:
+        header = f.read(24)
+    if header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        raise ValueError(f"Not a PNG template: {path}")
+    return struct.unpack(">II", header[16:24])
+
+
+def template_size(path: str) -> Tuple[int, int]:
+    """Returns a PNG template's (width, height) from its header, without decoding it."""
+    return _png_size(path, os.path.getmtime(path))
+
+
+@lru_cache(maxsize=16)
+def _data_uri(path: str, mtime: float) -> str:
+    with open(path, "rb") as f:
+        return "data:image/png;base64," + base64.b64encode(f.read()).decode("ascii")
+
+
+def template_href(layout: ChartLayout, base_image_path: str) -> str:
+    """
+    Returns the href the SVG uses for its template: layout.svg_template_url plus the file
+    name, or a data URI (built once per process) when no URL is configured.
+    """
+    if layout.svg_template_url:
+        return layout.svg_template_url + os.path.basename(base_image_path)
+    return _data_uri(base_image_path, os.path.getmtime(base_image_path))
+
+
+def _svg_document(layout: ChartLayout, base_image_path: str, body: List[str]) -> str:
+    width, height = template_size(base_image_path)
+    return "".join([
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        f'<image width="{width}" height="{height}" href={quoteattr(template_href(layout, base_image_path))}/>',
+        *body,
+        "</svg>",
+    ])
+
+
+def _svg_line(layout: ChartLayout, start: Tuple[float, float], end: Tuple[float, float], style: str) -> str:
+    width = layout.line_width
+    if start[0] == end[0] and start[1] <= end[1]:
+        # Cover the same pixel columns and rows as the raster renderer
+        x = int(start[0]) - (width - 1) // 2 + width / 2
+        x1, y1, x2, y2 = x, int(start[1]), x, int(end[1]) + 1
+        length = int(end[1]) - int(start[1])
+    else:
+        (x1, y1), (x2, y2) = start, end
+        length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+    dash = ""
+    if style == "dotted":
+        # Stretch the pattern to a whole number of periods, like the raster dash mask
+        dots = int(length / (layout.dash_length + layout.dash_gap))
+        if dots == 0:
+            return ""
+        period = length / dots
+        on = period * layout.dash_length / (layout.dash_length + layout.dash_gap)
+        dash = f' stroke-dasharray="{on:.3f} {period - on:.3f}" stroke-dashoffset="{-layout.dash_phase:g}"'
+    elif style != "solid":
+        return ""
+    return (f'<line x1="{x1:g}" y1="{y1:g}" x2="{x2:g}" y2="{y2:g}" stroke={quoteattr(layout.line_color)} '
+            f'stroke-width="{width}"{dash}/>')
+
+
+def svg_chart_lines(layout: ChartLayout, lines: List[dict], base_image_path: str) -> str:
+    """Returns the SVG for a line chart: the template plus one <line> per entry of lines."""
+    return _svg_document(layout, base_image_path,
+                         [_svg_line(layout, line["start"], line["end"], line["style"]) for line in lines])
+
+
+def svg_sake_simple_chart(layout: ChartLayout, params: dict, text: str, base_image_path: str) -> str:
+    """Returns the SVG for the simple chart: the template, the star marker and the label above it."""
+    x = layout.simple_left + (layout.simple_width * params["dry_or_sweet"]["value"] / 100)
+    y = layout.simple_top + (layout.simple_height * params["fruity_or_rich"]["value"] / 100)
+    size = layout.star_size
+    points = f"{x - size:g},{y:g} {x:g},{y - size:g} {x + size:g},{y:g} {x:g},{y + size:g}"
+    return _svg_document(layout, base_image_path, [
+        f'<polygon points="{points}" fill="blue"/>',
+        f'<text x="{x:g}" y="{y - size:g}" text-anchor="middle" dominant-baseline="text-after-edge" '
+        f'font-family={quoteattr(SVG_FONT_FAMILY)} font-size="{layout.font_size}" '
+        f'fill={quoteattr(layout.font_color)}>{escape(text)}</text>',
+    ])
@@ -0,0 +1,43 @@
+"""LabelCache must draw exactly what ImageDraw.text draws, at any sub-pixel position."""
+
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+import sakecharts
+
+TEXTS = [sakecharts.SIMPLE_CHART_TEXT, "銘柄12 BY7 gjpqy", "A"]
+
+
+@pytest.fixture(scope="module")
+def layout():
+    return sakecharts.ChartLayout()
+
+
+def draw_both(layout, cache, xy, text):
+    font = layout.get_font()
+    expected = Image.new("RGBA", (1100, 800))
+    actual = expected.copy()
+    ImageDraw.Draw(expected).text(xy, text, fill=layout.font_color, font=font)
+    cache.draw(ImageDraw.Draw(actual), xy, text, font, layout.font_color)
+    return expected, actual
+
+
+def test_matches_imagedraw_at_random_positions(layout):
+    rng = random.Random(0)
+    cache = sakecharts.LabelCache()
+    for i in range(300):
+        # Also cover labels hanging off the top and left edges
+        xy = (rng.uniform(-20, 1000), rng.uniform(-20, 700))
+        text = TEXTS[i % len(TEXTS)]
+        expected, actual = draw_both(layout, cache, xy, text)
+        assert expected.tobytes() == actual.tobytes(), f"{text!r} at {xy}"
+
+
+@pytest.mark.parametrize("xy", [(0, 0), (10.5, 20.5), (0.999, 0.001), (-3.25, 5.75)])
+def test_matches_imagedraw_when_cached(layout, xy):
+    cache = sakecharts.LabelCache()
+    for _ in range(2):  # First draw fills the cache, second uses it
+        expected, actual = draw_both(layout, cache, xy, sakecharts.SIMPLE_CHART_TEXT)
+        assert expected.tobytes() == actual.tobytes()
@@ -1,4 +1,4 @@
-from PIL import Image, ImageDraw
+from sakecharts import ChartLayout, render_chart_image
 
 saketype = 45  # 15:大吟醸 45:吟醸 52:特別純米 60:純米 76:普通
 saketype_line = "solid"
@@ -25,65 +25,20 @@ svm_line = "solid"
 
 DorS = 30  # 0:Dry 100:Sweet
 
-# ラインの一番左のピクセル
-av_line_start_left = 222
-# ラインの一番右のピクセル
-av_line_end_right = 1270
-# ラインの一番左から一番右までの長さ
-av_line_length = av_line_end_right - av_line_start_left
-# パーセンテージを掛けて長さを計算するための定数
-av_line_add = av_line_length/100
-
-# 酵母の配置が少し右にずれているので、それを修正するためのオフセット
-yeast_offset = 22
-
-
-def draw_custom_lines(image_path, lines):
-    """
-    Draw lines with custom settings on an image.
-
-    :param image_path: Path to the image.
-    :param lines: List of tuples, each containing (start_x, start_y, end_x, end_y, line_type, width)
-                  where line_type is "solid" or "dotted" and width is the line thickness.
-    """
-    # Open the image
-    with Image.open(image_path) as img:
-        draw = ImageDraw.Draw(img)
-
-        # Function to draw a dotted line
-        def draw_dotted_line(start, end, width):
-            line_length = ((end[0] - start[0])**2 + (end[1] - start[1])**2)**0.5
-            dots = int(line_length / 12)
-            for i in range(dots):
-                segment_start = (start[0] + (end[0] - start[0]) * i / dots, start[1] + (end[1] - start[1]) * i / dots)
-                segment_end = (start[0] + (end[0] - start[0]) * (i + 0.5) / dots, start[1] + (end[1] - start[1]) * (i + 0.5) / dots)
-                draw.line([segment_start, segment_end], fill="orange", width=width)
-
-
-        # Iterate over the lines and draw each one
-        for start_x, start_y, end_x, end_y, line_type, width in lines:
-            start, end = (start_x, start_y), (end_x, end_y)
-            if line_type == "solid":
-                draw.line([start, end], fill="orange", width=width)
-                # draw.line([(start_x, start_y), (end_x, end_y)], fill="orange", width=width)
-            elif line_type == "dotted":
-                draw_dotted_line(start, end, width)
-
-        # Save or display the modified image
-        img.save("advanced_wine-lined.png")
-        img.show()
-
-
-# 描くラインをリストで提供
-lines = [
-    (av_line_start_left+saketype*av_line_add, 2, av_line_start_left+saketype*av_line_add, 100, saketype_line, 8),  # Dotted line from (start-tupple) to (end-tupple) with thickness 8
-    (av_line_start_left+rice*av_line_add, 100, av_line_start_left+rice*av_line_add, 202, rice_line, 8),
-    (av_line_start_left+fstarter*av_line_add, 202, av_line_start_left+fstarter*av_line_add, 305, fstarter_line, 8), 
-    (av_line_start_left+yeast*av_line_add+yeast_offset, 305, av_line_start_left+yeast*av_line_add+yeast_offset, 390, yeast_line, 8),
-    (av_line_start_left+amino*av_line_add, 390, av_line_start_left+amino*av_line_add, 485, amino_line, 8), 
-    (av_line_start_left+acid*av_line_add, 485, av_line_start_left+acid*av_line_add, 580, acid_line, 8),
-    (av_line_start_left+svm*av_line_add, 580, av_line_start_left+svm*av_line_add, 670, svm_line, 8),
-    (av_line_start_left+DorS*av_line_add, 670, av_line_start_left+DorS*av_line_add, 780, "solid", 8),
-]
-
-draw_custom_lines("advanced_wine.png", lines)
+# sakechartsのパラメータ形式に変換（ForRとDorSのラインは常に実線）
+params = {
+    "saketype": {"value": saketype, "style": saketype_line},
+    "rice": {"value": rice, "style": rice_line},
+    "fstarter": {"value": fstarter, "style": fstarter_line},
+    "yeast": {"value": yeast, "style": yeast_line},
+    "fruity_or_rich": {"value": ForR, "style": "solid"},
+    "amino": {"value": amino, "style": amino_line},
+    "acid": {"value": acid, "style": acid_line},
+    "svm": {"value": svm, "style": svm_line},
+    "dry_or_sweet": {"value": DorS, "style": "solid"},
+}
+
+# ライン位置と描画は全スクリプト共通のsakechartsパッケージで計算する
+image = render_chart_image(ChartLayout(), params, "advanced_wine")
+image.save("advanced_wine-lined.png")
+image.show()